@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+"""Microbenchmark comparing the ConnectorEngine with the former greedy matcher
+of ProfileBuilder. The connectors of both implementations are compared on
+random profiles before timing them.
+
+Usage: python benchmarks/connectorBenchmark.py [--layers 50 100 ...] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from geoCore.connector import Connector
+from geoCore.connectorEngine import ConnectorEngine
+from geoCore.profile import Profile
+
+class Box:
+    """Minimal stand-in for ProfileBox"""
+
+    def __init__(self, group, height, width):
+        self.group = group
+        self.height = height
+        self.width = width
+
+def legacyConnectTwoProfiles(pLeft, pRight):
+    """The former ProfileBuilder._connectTwoProfiles"""
+    connectors = []
+    lgLeft = None
+    yLeft = pLeft.y
+    yRight = pRight.y
+
+    l = 0
+    r = 0
+    while l < len(pLeft.boxes):
+        if lgLeft != pLeft.boxes[l].group:
+            c = Connector()
+            c.x1 = pLeft.x
+            c.y1 = yLeft
+            c.xOffset = pLeft.boxes[l].width
+
+            found = False
+            while (r < len(pRight.boxes)) and not found:
+                if pLeft.boxes[l].group == pRight.boxes[r].group:
+                    c.x2 = pRight.x
+                    c.y2 = yRight
+                    found = True
+                    connectors.append(c)
+                yRight = yRight - pRight.boxes[r].height
+                r = r + 1
+
+        lgLeft = pLeft.boxes[l].group
+        yLeft = yLeft - pLeft.boxes[l].height
+
+        if len(pLeft.boxes) != len(pRight.boxes) and r == len(pRight.boxes):
+            c = Connector()
+            c.x2 = pRight.x
+            c.y2 = pRight.y - sum([b.height for b in pRight.boxes])
+
+            found = False
+            ll = len(pLeft.boxes) - 1
+            while ll >= l and not found:
+                if pLeft.boxes[ll].group == pRight.boxes[r - 1].group:
+                    c.x1 = pLeft.x
+                    c.y1 = pLeft.y - sum([b.height for b in pLeft.boxes[:ll+1]])
+                    c.xOffset = pLeft.boxes[ll].width
+                    found = True
+                    connectors.append(c)
+                ll = ll - 1
+
+        if l == len(pLeft.boxes) - 1:
+            c = Connector()
+            c.x1 = pLeft.x
+            c.y1 = pLeft.y - sum([b.height for b in pLeft.boxes])
+            c.xOffset = pLeft.boxes[l].width
+
+            found = False
+            rr = len(pRight.boxes) - 1
+            while (rr >= r - 1) and not found:
+                if pLeft.boxes[l].group == pRight.boxes[rr].group:
+                    c.x2 = pRight.x
+                    c.y2 = pRight.y - sum([b.height for b in pRight.boxes[:rr+1]])
+                    found = True
+                    connectors.append(c)
+                rr = rr - 1
+
+        l = l + 1
+
+    return connectors
+
+def randomProfile(rnd, name, x, layers, groups, noGroup=0.0):
+    """Create a profile with the given number of layers. Consecutive layers
+    often share a group and groups mostly appear in ascending order. The
+    given share of layers has no group (None), like empty cells of a CSV."""
+    p = Profile(name)
+    p.x = x
+    p.y = rnd.uniform(-200.0, 200.0)
+    group = 0
+    for _ in range(layers):
+        if rnd.random() < 0.4:
+            group = min(groups, group + rnd.randint(1, 3))
+        elif rnd.random() < 0.05:
+            group = rnd.randint(0, groups)
+        boxGroup = None if rnd.random() < noGroup else group
+        p.addBox(Box(boxGroup, rnd.choice([0.5, 1.0, 2.5, 5.0, 10.0, 30.0]), rnd.choice([1.0, 2.25, 3.5])))
+    return p
+
+def exhaustingProfiles(layers):
+    """Create a pair of profiles where the right profile is exhausted by the
+    first box on the left, which is the worst case of the former matcher."""
+    pLeft = Profile("left")
+    pRight = Profile("right")
+    pRight.x = 100.0
+    for group in range(layers // 2):
+        pRight.addBox(Box(group, 1.0, 1.0))
+    last = layers // 2 - 1
+    for i in range(layers):
+        pLeft.addBox(Box(last if i in (0, layers - 1) else layers + i, 1.0, 1.0))
+    return pLeft, pRight
+
+def asTuples(connectors):
+    """Connectors as comparable tuples"""
+    return [(c.x1, round(c.y1, 6), c.xOffset, c.x2, round(c.y2, 6)) for c in connectors]
+
+def verify(rnd, runs):
+    """Make sure both implementations yield the same connectors"""
+    engine = ConnectorEngine()
+    for _ in range(runs):
+        groups = rnd.randint(1, 40)
+        noGroup = rnd.choice([0.0, 0.1, 0.5])
+        pLeft = randomProfile(rnd, "left", 0.0, rnd.randint(1, 60), groups, noGroup)
+        pRight = randomProfile(rnd, "right", 100.0, rnd.randint(1, 60), groups, noGroup)
+        expected = asTuples(legacyConnectTwoProfiles(pLeft, pRight))
+        actual = asTuples(engine.connectTwoProfiles(pLeft, pRight))
+        if expected != actual:
+            raise AssertionError("connectors differ:\n{}\n{}".format(expected, actual))
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layers", type=int, nargs="+", default=[10, 50, 100, 200, 400, 800])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=4711)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    verify(rnd, 2000)
+
+    engine = ConnectorEngine()
+    print("{:>10} {:>8} {:>14} {:>14} {:>9}".format("case", "layers", "legacy [ms]", "engine [ms]", "speedup"))
+    for layers in args.layers:
+        groups = max(1, layers // 3)
+        cases = [("random", randomProfile(rnd, "left", 0.0, layers, groups),
+                randomProfile(rnd, "right", 100.0, layers, groups)),
+            ("exhausted",) + exhaustingProfiles(layers)]
+        for name, pLeft, pRight in cases:
+            if asTuples(legacyConnectTwoProfiles(pLeft, pRight)) != asTuples(engine.connectTwoProfiles(pLeft, pRight)):
+                raise AssertionError("connectors differ for case {}".format(name))
+            legacy = min(timeit.repeat(lambda l=pLeft, r=pRight: legacyConnectTwoProfiles(l, r),
+                number=1, repeat=args.repeat))
+            linear = min(timeit.repeat(lambda l=pLeft, r=pRight: engine.connectTwoProfiles(l, r),
+                number=1, repeat=args.repeat))
+            print("{:>10} {:>8} {:>14.3f} {:>14.3f} {:>8.1f}x".format(name, layers,
+                legacy * 1000, linear * 1000, legacy / linear))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+"""Benchmark suite of the drawing pipeline on synthetic data (see syntheticData.py).
+It times loading the data, building the profiles, connecting them, auto-scaling,
+constructing the scene and exporting it on Qt's offscreen platform. The results
+are saved as JSON, so they can be compared between commits. Requires the Python
+environment of QGIS.
+
+Usage:
+    python benchmarks/suite.py run [-o results.json] [--boreholes N] [--stages ...]
+    python benchmarks/suite.py compare old.json new.json [--threshold 0.1]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, ".."))
+sys.path.insert(0, BENCHMARK_DIR)
+
+# pylint: disable=wrong-import-position
+from syntheticData import SyntheticData
+
+STAGES = ["loadCsv", "fetchLayer", "buildProfiles", "connectProfiles", "autoScale",
+    "paintScene", "rescale", "exportSvg", "writeSvg", "exportPng"]
+
+class Context:
+    """The data and intermediate results shared by the stages"""
+
+    def __init__(self, data, directory):
+        """Initialize the context"""
+        # pylint: disable=import-outside-toplevel
+        from geoCore.render import TableFeature, ensureApplication
+        from geoCore.profileBuilder import ProfileBuilder
+        ensureApplication()
+        self.data = data
+        self.directory = directory
+        self.features = [TableFeature(i, b) for i, b in enumerate(data.boreholes)]
+        self.layerData = data.layerData()
+        self.builder = ProfileBuilder("synthetic", self.showMessage, self.layerData)
+        self.profiles = self.builder.buildProfiles(self.features)
+        self.otbps = self.builder.arrangeProfiles(self.features, self.profiles)
+        self.messages = 0
+
+    def showMessage(self, title, message, level):
+        """Count the messages instead of showing them"""
+        self.messages = self.messages + 1
+
+    def paint(self, otbps=None):
+        """Construct a new scene of the objects to be painted (default: the
+        context's). The objects' items are moved to the new scene."""
+        # pylint: disable=import-outside-toplevel
+        from qgis.PyQt.QtWidgets import QGraphicsScene
+        from geoCore.profilePainter import ProfilePainter
+        scene = QGraphicsScene()
+        painter = ProfilePainter(scene, 1200, 800)
+        painter.paint(self.otbps if otbps is None else otbps, False)
+        return scene, painter
+
+def stageFunctions(ctx):
+    """Return the function timed by each stage"""
+    # pylint: disable=import-outside-toplevel,protected-access
+    from qgis.PyQt.QtWidgets import QGraphicsScene
+    from geoCore.render import readTable, groupLayerData
+    from geoCore.profilePainter import ProfilePainter
+    from geoCore.sceneExporter import SceneExporter
+
+    boreholesCsv, layersCsv = ctx.data.writeCsv(ctx.directory)
+    # the stages rescale and export* need objects of their own, since
+    # paintScene moves the items of the context's objects to a new scene
+    scene, painter = ctx.paint(ctx.builder.getProfilesAndConnectors(ctx.features))
+
+    def loadCsv():
+        readTable(boreholesCsv)
+        groupLayerData(readTable(layersCsv), ctx.data.settings["dataId"])
+
+    def buildProfiles():
+        ctx.builder._layerInfo.cache_clear()
+        ctx.builder.buildProfiles(ctx.features)
+
+    def connectProfiles():
+        ctx.builder._connectorEngine.connectProfiles(ctx.profiles)
+
+    scalingPainter = ProfilePainter(QGraphicsScene(), 1200, 800)
+
+    def autoScale():
+        scalingPainter._setAutoXFac(scalingPainter._xPositions(ctx.otbps))
+        scalingPainter._setAutoYFac(ctx.otbps)
+
+    def rescale():
+        painter.rescale(2.0, 0.5)
+        painter.rescale(None, None)
+
+    return {
+        "loadCsv": loadCsv,
+        "fetchLayer": layerFetch(ctx),
+        "buildProfiles": buildProfiles,
+        "connectProfiles": connectProfiles,
+        "autoScale": autoScale,
+        "paintScene": ctx.paint,
+        "rescale": rescale,
+        "exportSvg": lambda: SceneExporter(scene).export(os.path.join(ctx.directory, "section.svg")),
+        "writeSvg": lambda: painter.writeSvg(os.path.join(ctx.directory, "streamed.svg")),
+        "exportPng": lambda: SceneExporter(scene).export(os.path.join(ctx.directory, "section.png")),
+    }
+
+def layerFetch(ctx):
+    """Return a function fetching the layer data from a memory layer in bulk,
+    or None if the memory provider is not available"""
+    # pylint: disable=import-outside-toplevel
+    from qgis.core import QgsApplication, QgsFeature, QgsField, QgsProject, QgsVectorLayer
+    from qgis.PyQt.QtCore import QVariant
+    from geoCore.layerDataIndex import LayerDataIndex
+    from geoCore.profileBuilder import ProfileBuilder
+
+    if not isinstance(QgsApplication.instance(), QgsApplication):
+        return None
+    layer = QgsVectorLayer("None", "synthetic_data", "memory")
+    if not layer.isValid():
+        return None
+
+    names = list(ctx.data.layers[0])
+    layer.dataProvider().addAttributes([QgsField(n, fieldType(ctx.data.layers, n)) for n in names])
+    layer.updateFields()
+    features = []
+    for l in ctx.data.layers:
+        f = QgsFeature(layer.fields())
+        f.setAttributes([l[n] for n in names])
+        features.append(f)
+    layer.dataProvider().addFeatures(features)
+    QgsProject.instance().addMapLayer(layer)
+
+    builder = ProfileBuilder("synthetic", ctx.showMessage)
+    ids = [b[ctx.data.settings["boreholeId"]] for b in ctx.data.boreholes]
+
+    def fetchLayer():
+        LayerDataIndex.instance().clear()
+        builder._getSchichtdaten(ids) # pylint: disable=protected-access
+
+    return fetchLayer
+
+def fieldType(rows, name):
+    """Return the field type of the column, i.e. of its first value which is not None"""
+    from qgis.PyQt.QtCore import QVariant # pylint: disable=import-outside-toplevel
+    for r in rows:
+        if r[name] is not None:
+            return QVariant.String if isinstance(r[name], str) else QVariant.Double
+    return QVariant.String
+
+def initQgis():
+    """Initialize QGIS (offscreen) so the memory provider is available"""
+    # pylint: disable=import-outside-toplevel
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from qgis.core import QgsApplication
+    app = QgsApplication([], False)
+    app.initQgis()
+    return app
+
+def gitCommit():
+    """Return the current commit or None"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BENCHMARK_DIR,
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    """Run the benchmarks and save the results"""
+    _app = initQgis() # keep a reference for the application's lifetime
+    from qgis.PyQt.QtCore import QT_VERSION_STR # pylint: disable=import-outside-toplevel
+
+    data = SyntheticData(args.boreholes, args.min_layers, args.max_layers, args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        ctx = Context(data, directory)
+        functions = stageFunctions(ctx)
+        for stage in args.stages:
+            fn = functions[stage]
+            if fn is None:
+                print("{:>16}  skipped".format(stage))
+                continue
+            runs = timeit.repeat(fn, number=1, repeat=args.repeat)
+            results[stage] = {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+            print("{:>16} {:>10.3f} s (median {:.3f} s)".format(stage, min(runs), statistics.median(runs)))
+
+    output = {
+        "meta": {
+            "commit": gitCommit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "boreholes": args.boreholes,
+            "layers": len(data.layers),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print("results written to {}".format(args.output))
+
+def compare(args):
+    """Compare two result files. Return 1 if a stage got slower than the threshold."""
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print("old: {} ({} layers)".format(old["meta"].get("commit"), old["meta"].get("layers")))
+    print("new: {} ({} layers)".format(new["meta"].get("commit"), new["meta"].get("layers")))
+    print("{:>16} {:>10} {:>10} {:>8}".format("stage", "old [s]", "new [s]", "ratio"))
+    regressions = 0
+    for stage in STAGES:
+        if (stage not in old["results"]) or (stage not in new["results"]):
+            continue
+        o = old["results"][stage]["min"]
+        n = new["results"][stage]["min"]
+        ratio = n / o if o > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "slower"
+            regressions = regressions + 1
+        elif ratio < 1 - args.threshold:
+            flag = "faster"
+        print("{:>16} {:>10.3f} {:>10.3f} {:>7.2f}x {}".format(stage, o, n, ratio, flag))
+    return 1 if regressions > 0 else 0
+
+def main():
+    """Run or compare the benchmarks"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    runParser = sub.add_parser("run", help="run the benchmarks")
+    runParser.add_argument("-o", "--output", default="benchmark.json")
+    runParser.add_argument("--boreholes", type=int, default=2000)
+    runParser.add_argument("--min-layers", type=int, default=10)
+    runParser.add_argument("--max-layers", type=int, default=200)
+    runParser.add_argument("--seed", type=int, default=4711)
+    runParser.add_argument("--repeat", type=int, default=3)
+    runParser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+
+    compareParser = sub.add_parser("compare", help="compare two result files")
+    compareParser.add_argument("old")
+    compareParser.add_argument("new")
+    compareParser.add_argument("--threshold", type=float, default=0.1,
+        help="relative change reported as slower or faster (default: 0.1)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        if importlib.util.find_spec("qgis") is None:
+            print("The benchmarks require the Python environment of QGIS.", file=sys.stderr)
+            return 2
+        run(args)
+        return 0
+    return compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+"""Generator of synthetic drilling profiles for benchmarks. The boreholes lie
+along a random walk, their layers use the petrography codes, facies and colours
+of geoCore.yml and are grouped randomly, so neighbouring profiles share groups.
+The columns are named as configured in config.yml.
+
+Usage: python benchmarks/syntheticData.py OUTDIR [--boreholes N] [--min-layers N] [--max-layers N]
+
+writes OUTDIR/synthetic.csv and OUTDIR/synthetic_data.csv, which may be
+rendered with python -m geoCore.render.
+"""
+
+import argparse
+import csv
+import os
+import random
+
+import yaml
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "geoCore", "config")
+
+def readYml(*path):
+    """Read a YML file of the plugin's configuration"""
+    with open(os.path.join(CONFIG_DIR, *path), encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+class SyntheticData:
+    """Synthetic boreholes and their layers as lists of attribute dictionaries"""
+
+    def __init__(self, boreholes=1000, minLayers=10, maxLayers=100, seed=4711):
+        """Generate the given number of boreholes"""
+        self.settings = readYml("config.yml")
+        geoCore = readYml("geoCore", "geoCore.yml")
+        self._mainGroups = list(geoCore["boxes"])
+        self._descriptions = list(geoCore["descriptions"])
+        self._facies = list(geoCore["facies"])
+        self._colors = list(geoCore["colors"])
+
+        rnd = random.Random(seed)
+        self.boreholes = []
+        self.layers = []
+        x = rnd.uniform(32400000.0, 32500000.0)
+        y = rnd.uniform(5900000.0, 6000000.0)
+        for i in range(boreholes):
+            x = x + rnd.uniform(5.0, 500.0)
+            y = y + rnd.uniform(-250.0, 250.0)
+            boreholeId = "B{}".format(i + 1)
+            self.boreholes.append({
+                self.settings["boreholeId"]: boreholeId,
+                self.settings["xCoord"]: x,
+                self.settings["yCoord"]: y,
+                self.settings["zCoord"]: rnd.uniform(-5.0, 30.0)})
+            self.layers.extend(self._layers(rnd, boreholeId, rnd.randint(minLayers, maxLayers)))
+
+    def _layers(self, rnd, boreholeId, count):
+        """Generate the layers of a borehole"""
+        layers = []
+        depth = 0.0
+        group = 0
+        for layerNo in range(1, count + 1):
+            if rnd.random() < 0.4:
+                group = group + rnd.randint(1, 3)
+            elif rnd.random() < 0.05:
+                group = rnd.randint(0, group)
+            height = rnd.choice([1.0, 2.5, 5.0, 10.0, 20.0, 50.0])
+            layers.append({
+                self.settings["dataId"]: boreholeId,
+                self.settings["layerNo"]: layerNo,
+                self.settings["group"]: group,
+                self.settings["depthFrom"]: depth,
+                self.settings["depthTo"]: depth + height,
+                self.settings["petrography"]: self._petrography(rnd),
+                self.settings["color"]: rnd.choice(self._colors),
+                self.settings["facies"]: rnd.choice(self._facies) if rnd.random() < 0.5 else None,
+                self.settings["comment"]: "comment {}".format(layerNo) if rnd.random() < 0.1 else None})
+            depth = depth + height
+        return layers
+
+    def _petrography(self, rnd):
+        """Generate a petrography like S(u4, h) or U(fs(u1))"""
+        gg = rnd.choice(self._mainGroups)
+        kg = rnd.sample(self._descriptions, rnd.randint(0, min(3, len(self._descriptions))))
+        if len(kg) == 0:
+            return gg
+        if (len(kg) > 1) and (rnd.random() < 0.2):
+            return "{}({}({}))".format(gg, kg[0], ", ".join(kg[1:]))
+        return "{}({})".format(gg, ", ".join(kg))
+
+    def layerData(self):
+        """Group the layers by borehole as expected by ProfileBuilder's layerData"""
+        layerData = {}
+        for l in self.layers:
+            layerData.setdefault(l[self.settings["dataId"]], []).append(l)
+        return layerData
+
+    def writeCsv(self, directory, name="synthetic"):
+        """Write the boreholes and their layers to CSV files.
+        Return the names of both files."""
+        files = []
+        for fileName, rows in ((name + ".csv", self.boreholes), (name + "_data.csv", self.layers)):
+            fileName = os.path.join(directory, fileName)
+            with open(fileName, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]), delimiter=";")
+                writer.writeheader()
+                writer.writerows(rows)
+            files.append(fileName)
+        return files
+
+def main():
+    """Write a synthetic data set"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("outdir")
+    parser.add_argument("--boreholes", type=int, default=1000)
+    parser.add_argument("--min-layers", type=int, default=10)
+    parser.add_argument("--max-layers", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=4711)
+    args = parser.parse_args()
+
+    os.makedirs(args.outdir, exist_ok=True)
+    data = SyntheticData(args.boreholes, args.min_layers, args.max_layers, args.seed)
+    for fileName in data.writeCsv(args.outdir):
+        print(fileName)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+""" Batch export of sections of drilling profiles
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+
+ Renders the sections listed in a manifest using a pool of worker processes, e.g.
+
+    python -m geoCore.batch example_data/corings.csv sections.yml \\
+        --layers example_data/corings_data.csv --workers 4
+
+ The manifest is a YAML file containing a list of sections:
+
+    sections:
+      - output: out/section1.svg   # relative to the manifest's directory
+        ids: [Core 1, Core 2]      # default: all drilling profiles
+        direction: we              # ns (default), sn, we or ew
+        xFac: 0.5                  # default: auto-scaling
+        yFac: 0.1                  # default: auto-scaling
+        description: false         # default: only for single profiles
+
+ The data is loaded once and handed to each worker when it starts.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import yaml
+
+from .geoCoreConfig import Config
+from .render import DIRECTIONS, SectionRenderer, addDataArguments, loadData, printMessage
+
+# the worker's renderer, see _initWorker
+_renderer = None
+
+class Section:
+    """A section of the manifest"""
+
+    def __init__(self, index, output, ids=None, direction="ns", xFac=None, yFac=None, description=None):
+        """Initialize the section, which is the index-th of the manifest"""
+        if direction not in DIRECTIONS:
+            raise ValueError("Unknown direction {} of section {}".format(direction, index + 1))
+        self.index = index
+        self.output = output
+        self.ids = ids
+        self.direction = direction
+        self.xFac = xFac
+        self.yFac = yFac
+        self.description = description
+
+class SectionResult:
+    """The outcome of rendering a section"""
+
+    def __init__(self, section, seconds, profiles=0, error=None, unmatched=()):
+        """Initialize the result. The error is None if the section was rendered,
+        unmatched are the section's ids which match no drilling profile."""
+        self.section = section
+        self.seconds = seconds
+        self.profiles = profiles
+        self.error = error
+        self.unmatched = list(unmatched)
+
+def readManifest(fileName):
+    """Read the sections of the manifest. Relative output files
+    are relative to the manifest's directory."""
+    with open(fileName, encoding='utf-8') as f:
+        manifest = yaml.safe_load(f)
+
+    base = Path(fileName).resolve().parent
+    sections = []
+    for index, entry in enumerate(manifest["sections"]):
+        entry = dict(entry)
+        entry["output"] = str(base / entry["output"])
+        sections.append(Section(index, **entry))
+    return sections
+
+def _initWorker(boreholes, layerData, viewSize):
+    """Set up the worker's renderer with the shared data"""
+    global _renderer # pylint: disable=global-statement
+    _renderer = SectionRenderer(boreholes, layerData, viewSize=viewSize)
+
+def _renderSection(section):
+    """Render the section with the worker's renderer"""
+    start = time.perf_counter()
+    unmatched = _renderer.unmatchedIds(section.ids)
+    try:
+        Path(section.output).parent.mkdir(parents=True, exist_ok=True)
+        profiles = _renderer.render(section.output, section.ids, section.direction,
+            section.xFac, section.yFac, section.description)
+        return SectionResult(section, time.perf_counter() - start, profiles, unmatched=unmatched)
+    except Exception as e: # pylint: disable=broad-except
+        # a failing section must not stop the batch
+        return SectionResult(section, time.perf_counter() - start, error=_describe(e), unmatched=unmatched)
+
+def _describe(e):
+    """Describe the exception of a failed section"""
+    return "{}: {}".format(type(e).__name__, e)
+
+def renderSections(sections, boreholes, layerData, workers=1, viewSize=(1200, 800)):
+    """Render the sections using the given number of worker processes.
+    Return the results in the order of the sections."""
+    initArgs = (boreholes, layerData, viewSize)
+    if workers <= 1:
+        _initWorker(*initArgs)
+        return [_renderSection(s) for s in sections]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=initArgs) as pool:
+        futures = {pool.submit(_renderSection, s): s for s in sections}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                # a worker died (e.g. crashed in Qt), the pending sections fail with it
+                results.append(SectionResult(futures[future], 0.0, error="worker process died: {}".format(e)))
+            except Exception as e: # pylint: disable=broad-except
+                results.append(SectionResult(futures[future], 0.0, error=_describe(e)))
+    return sorted(results, key=lambda r: r.section.index)
+
+def printReport(results, seconds, out=sys.stdout):
+    """Print the timings of all sections and the failures"""
+    print("{:>4} {:>9} {:>8}  {}".format("#", "time [s]", "profiles", "output"), file=out)
+    for r in results:
+        print("{:>4} {:>9.3f} {:>8}  {}".format(r.section.index + 1, r.seconds,
+            r.profiles if r.error is None else "FAILED", r.section.output), file=out)
+
+    failures = [r for r in results if r.error is not None]
+    print("\n{} sections rendered, {} failed, {:.3f} s elapsed, {:.3f} s rendering".format(
+        len(results) - len(failures), len(failures), seconds, sum(r.seconds for r in results)), file=out)
+    for r in failures:
+        print("section {} ({}): {}".format(r.section.index + 1, r.section.output, r.error), file=out)
+    for r in results:
+        if len(r.unmatched) > 0:
+            print("section {} ({}): drilling profiles not found: {}".format(r.section.index + 1,
+                r.section.output, ", ".join(map(str, r.unmatched))), file=out)
+
+def main(argv=None):
+    """Render the sections of the manifest given on the command line"""
+    parser = argparse.ArgumentParser(prog="python -m geoCore.batch",
+        description="Render the sections of a manifest to SVG or image files.")
+    addDataArguments(parser)
+    parser.add_argument("manifest", help="YAML file listing the sections")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of worker processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    settings = Config(printMessage).settings
+    sections = readManifest(args.manifest)
+    boreholes, layerData = loadData(args, settings)
+    results = renderSections(sections, boreholes, layerData, args.workers, tuple(args.view_size))
+    printReport(results, time.perf_counter() - start)
+    return 1 if any(r.error is not None for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+""" This module defines the class BoreholeIndex
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from functools import partial
+
+from qgis.core import QgsFeatureRequest, QgsSpatialIndex
+
+class BoreholeIndex:
+    """Process-wide cache of spatial indexes over the layers of drilling
+    profiles. An index is built when it is needed first and dropped as soon
+    as the layer signals a change, just like the LayerDataIndex."""
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide index"""
+        if cls._instance is None:
+            cls._instance = BoreholeIndex()
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the index"""
+        self._indexes = {} # layer id -> QgsSpatialIndex or None if outdated
+        self._connections = {} # layer id -> connections to the layer's signals
+
+    def within(self, layer, geometry, distance):
+        """Return the ids and geometries of the layer's features
+        within the given distance of the geometry (in layer units)"""
+        index = self._index(layer)
+        candidates = index.intersects(geometry.boundingBox().buffered(distance))
+        result = {}
+        for fid in candidates:
+            g = index.geometry(fid)
+            if g.distance(geometry) <= distance:
+                result[fid] = g
+        return result
+
+    def _index(self, layer):
+        """Return the spatial index of the layer, which is built if necessary.
+        The features' geometries are kept by the index."""
+        layerId = layer.id()
+        self._watch(layer)
+        index = self._indexes.get(layerId)
+        if index is None:
+            index = QgsSpatialIndex(layer.getFeatures(QgsFeatureRequest().setNoAttributes()),
+                None, QgsSpatialIndex.FlagStoreFeatureGeometries)
+            self._indexes[layerId] = index
+        return index
+
+    def _watch(self, layer):
+        """Start listening to the layer's change signals"""
+        layerId = layer.id()
+        if layerId in self._connections:
+            return
+
+        invalidate = partial(self.invalidate, layerId)
+        connections = [
+            (layer.featureAdded, invalidate),
+            (layer.featureDeleted, invalidate),
+            (layer.geometryChanged, invalidate),
+            (layer.dataChanged, invalidate),
+            (layer.afterCommitChanges, invalidate),
+            (layer.afterRollBack, invalidate),
+            (layer.willBeDeleted, partial(self.forget, layerId))]
+        for signal, slot in connections:
+            signal.connect(slot)
+        self._connections[layerId] = connections
+
+    def invalidate(self, layerId, *args):
+        """Drop the layer's index, it is built again when needed.
+        Further arguments of the layer's signals are ignored."""
+        self._indexes[layerId] = None
+
+    def forget(self, layerId):
+        """Drop the layer's index and stop listening to its signals"""
+        self._indexes.pop(layerId, None)
+        for signal, slot in self._connections.pop(layerId, []):
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass # the layer is already gone
+
+    def clear(self):
+        """Drop all indexes and stop listening to any layer"""
+        for layerId in list(self._connections):
+            self.forget(layerId)
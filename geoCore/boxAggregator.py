@@ -0,0 +1,89 @@
+""" This module contains the class BoxAggregator
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from .compositeBox import CompositeBox
+
+class BoxAggregator:
+    """This class decides which boxes of a profile are drawn. Consecutive boxes
+    drawn lower than the minimum height are merged into CompositeBoxes.
+    The result is kept per profile, thus it is only computed again if the
+    profile is painted with another scaling factor for the y-dimension."""
+
+    def __init__(self, minHeight=0):
+        """Initialize the aggregator. The minimum height is given in scene
+        units (i.e. pixels at the view's default zoom), 0 turns merging off."""
+        self.minHeight = minHeight
+        self._drawn = {} # profile -> (threshold, {(first, last): CompositeBox})
+
+    def apply(self, profile, yFac):
+        """Set the boxes to be drawn of the profile
+        painted with the given scaling factor"""
+        threshold = self.minHeight / (yFac * 10) if (self.minHeight > 0) and (yFac > 0) else 0.0 # mm to cm
+        cached = self._drawn.get(profile)
+        if (cached is not None) and (cached[0] == threshold):
+            return
+
+        heights = profile.partsHeights()
+        if (threshold <= 0) or (len(heights) == 0) or (min(heights) >= threshold):
+            profile.drawnBoxes = None
+            self._drawn[profile] = (threshold, {})
+            return
+
+        composites = cached[1] if cached is not None else {}
+        drawn = []
+        used = {}
+        start = None # first box of the current run of thin boxes
+        height = 0.0
+        for i, h in enumerate(heights):
+            if h >= threshold:
+                self._closeRun(profile, start, i - 1, composites, used, drawn)
+                start = None
+                drawn.append(profile.boxes[i])
+                continue
+            if start is None:
+                start = i
+                height = 0.0
+            height = height + h
+            if height >= threshold:
+                self._closeRun(profile, start, i, composites, used, drawn)
+                start = None
+        self._closeRun(profile, start, len(heights) - 1, composites, used, drawn)
+
+        profile.drawnBoxes = drawn
+        self._drawn[profile] = (threshold, used)
+
+    def _closeRun(self, profile, first, last, composites, used, drawn):
+        """Append the run of boxes from first to last (inclusive) to the drawn
+        boxes. Composites of the same boxes are reused, so are their items."""
+        if first is None:
+            return
+        if first == last:
+            drawn.append(profile.boxes[first])
+            return
+        composite = composites.get((first, last))
+        if composite is None:
+            composite = CompositeBox(profile.boxes[first:last + 1])
+        used[(first, last)] = composite
+        drawn.append(composite)
+
+    def forget(self, profile):
+        """Drop the result of the profile"""
+        self._drawn.pop(profile, None)
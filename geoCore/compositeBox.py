@@ -0,0 +1,65 @@
+""" This module contains the class CompositeBox
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from .profileBox import ProfileBox
+
+class CompositeBox(ProfileBox):
+    """CompositeBox represents consecutive layers of a drilling profile which
+    are too thin to be drawn on their own (see BoxAggregator). It is drawn
+    like the dominant layer, i.e. the thickest one."""
+
+    __slots__ = ('members',)
+
+    def __init__(self, members):
+        """Initialize the box of the given consecutive boxes (top to bottom)"""
+        first = members[0]
+        last = members[-1]
+        super().__init__(first.layer)
+        self.members = members
+        self.group = first.group
+        self.y = first.y
+        self.height = sum(b.height for b in members)
+        self.depth = last.depth
+        self.isFirst = first.isFirst
+        self.isLast = last.isLast
+
+        dominant = max(members, key=lambda b: b.height)
+        self.name = dominant.name
+        self.width = dominant.width
+        self.color = dominant.color
+        self.texture = dominant.texture
+        self.info = "{} layers, mainly {}".format(len(members), dominant.name)
+
+    def toolTip(self):
+        """Return the depth and info of every layer"""
+        return "\n".join("{:.2f} cm: {}".format(float(b.depth), b.info) for b in self.members)
+
+    def paint(self, items, xpos):
+        """Paint the box, its tool tip lists the layers"""
+        super().paint(items, xpos)
+        x, y, w, h = self._getPosAndDims(xpos)
+        items.toolTip((self, 'toolTip'), x, y, w, h, self.toolTip())
+
+    def _paintInfo(self, items, xpos, xoffset):
+        """Paint the info text, its tool tip lists the layers"""
+        t = super()._paintInfo(items, xpos, xoffset)
+        t.setToolTip(self.toolTip())
+        return t
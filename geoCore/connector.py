@@ -27,6 +27,8 @@ class Connector(Otbp):
     drilling profiles.
     This class contains all relevant data for drawing"""
 
+    __slots__ = ('x1', 'y1', 'x2', 'y2', 'xOffset')
+
     def __init__(self):
         """Initialize the connector"""
         super().__init__()
@@ -40,11 +42,15 @@ class Connector(Otbp):
         """Return the height of each connector"""
         return [fabs(self.y1 - self.y2)]
 
-    def paint(self, scene):
+    def batchGroup(self):
+        """All connectors share their paths"""
+        return Connector
+
+    def paint(self, items):
         """Paint connector onto scene"""
         # convert from cm to mm
         # direction of y-axis it top down, i.e. point (0,0) is in the upper left
-        scene.addLine((self.x1 * self._xFac + self.xOffset) * 10,
+        items.line('line', (self.x1 * self._xFac + self.xOffset) * 10,
             self.y1 * self._yFac * -10,
             self.x2 * self._xFac * 10,
             self.y2 * self._yFac * -10)
@@ -0,0 +1,111 @@
+""" This module contains the class ConnectorEngine
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from .connector import Connector
+
+class ConnectorEngine:
+    """This class constructs the connectors between neighbouring profiles.
+    Boxes of the same group are connected in a single pass over the boxes
+    of both profiles, i.e. in time linear to the number of boxes."""
+
+    def connectProfiles(self, profiles):
+        """Get the connectors of all pairs of neighbouring profiles"""
+        connectors = []
+        for pLeft, pRight in zip(profiles, profiles[1:]):
+            connectors.extend(self.connectTwoProfiles(pLeft, pRight))
+        return connectors
+
+    def connectTwoProfiles(self, pLeft, pRight):
+        """Get connectors for left and right profile.
+        Walking down the left profile the top of each new group is connected to
+        the top of the next box of the same group on the right. Furthermore the
+        bottom of the left profile is connected to the bottom of the last box
+        of the same group on the right and, if the right profile is exhausted
+        first, the bottom of the right profile is connected to the bottom of
+        the last box of the same group on the left."""
+        left = pLeft.boxes
+        right = pRight.boxes
+        if len(left) == 0 or len(right) == 0:
+            return []
+
+        # indices of the boxes of each group on the right (ascending)
+        # as well as the last index of each group on either side
+        positions = {}
+        lastRight = {}
+        for i, b in enumerate(right):
+            positions.setdefault(b.group, []).append(i)
+            lastRight[b.group] = i
+        lastLeft = {b.group: i for i, b in enumerate(left)}
+        cursors = {}
+
+        connectors = []
+        lastGroup = None # like the former matcher a first box without group gets no connector
+        r = 0 # index of the first box on the right which is still unconnected
+        for l, box in enumerate(left):
+            if box.group != lastGroup and r < len(right):
+                rr = self._nextIndex(positions, cursors, box.group, r)
+                if rr is None:
+                    r = len(right)
+                else:
+                    connectors.append(self._connector(pLeft.x, pLeft.top(l), box.width,
+                        pRight.x, pRight.top(rr)))
+                    r = rr + 1
+            lastGroup = box.group
+
+            if len(left) != len(right) and r == len(right):
+                # last profile box on the right but not on the left
+                ll = lastLeft.get(right[-1].group, -1)
+                if ll >= l:
+                    connectors.append(self._connector(pLeft.x, pLeft.bottom(ll), left[ll].width,
+                        pRight.x, pRight.bottom()))
+
+            if l == len(left) - 1:
+                # last profile box on the left
+                rr = lastRight.get(box.group, -1)
+                if rr >= max(r - 1, 0):
+                    connectors.append(self._connector(pLeft.x, pLeft.bottom(), box.width,
+                        pRight.x, pRight.bottom(rr)))
+
+        return connectors
+
+    def _nextIndex(self, positions, cursors, group, start):
+        """Return the index of the first box of the group on the right
+        at or after start or None if there is no such box. Since start
+        never decreases the cursors only move forward."""
+        indices = positions.get(group)
+        if indices is None:
+            return None
+
+        c = cursors.get(group, 0)
+        while c < len(indices) and indices[c] < start:
+            c = c + 1
+        cursors[group] = c
+        return indices[c] if c < len(indices) else None
+
+    def _connector(self, x1, y1, xOffset, x2, y2):
+        """Create a connector"""
+        c = Connector()
+        c.x1 = x1
+        c.y1 = y1
+        c.xOffset = xOffset
+        c.x2 = x2
+        c.y2 = y2
+        return c
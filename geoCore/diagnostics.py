@@ -0,0 +1,96 @@
+""" This module contains the class Diagnostics
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.core import Qgis, QgsMessageLog
+
+from .instrumentation import LOG_TAG
+
+class Diagnostics:
+    """This class collects the problems found while building drilling profiles,
+    e.g. unknown keys of the configuration. The same problem usually repeats in
+    many layers, thus they are counted by kind and key and reported at once:
+    a summary in the message bar and the affected profiles in the message log."""
+
+    # kinds of problems
+    MISSING_MAIN_GROUP = "missingMainGroup"
+    UNKNOWN_KEY = "unknownKey"
+
+    # kind -> (level, description of a key)
+    KINDS = {
+        MISSING_MAIN_GROUP: (Qgis.Warning, "Missing main group in petrography: {}"),
+        UNKNOWN_KEY: (Qgis.Info, "Key {} not found in config"),
+    }
+
+    # number of problems in the summary
+    SUMMARY_SIZE = 3
+    # number of profiles listed per problem
+    MAX_LISTED = 100
+
+    def __init__(self):
+        """Initialize an empty collection"""
+        self._issues = {} # (kind, key) -> [number of layers, {profile id: None}]
+
+    def add(self, kind, key, profileId):
+        """Record a problem of a layer of the given drilling profile"""
+        issue = self._issues.get((kind, key))
+        if issue is None:
+            issue = [0, {}]
+            self._issues[(kind, key)] = issue
+        issue[0] = issue[0] + 1
+        issue[1][profileId] = None
+
+    def isEmpty(self):
+        """Return True if no problem was recorded"""
+        return len(self._issues) == 0
+
+    def report(self, showMessage):
+        """Show a summary of the problems using showMessage(title, message, level)
+        and log the affected drilling profiles. The problems are dropped."""
+        if self.isEmpty():
+            return
+
+        issues = sorted(self._issues.items(), key=lambda i: -i[1][0])
+        self._issues = {}
+        level = max(self.KINDS[kind][0] for (kind, _), _ in issues)
+        profiles = set()
+        for _, (_, ids) in issues:
+            profiles.update(ids)
+
+        texts = ["{} ({} layers)".format(self._describe(kind, key), count)
+            for (kind, key), (count, _) in issues[:self.SUMMARY_SIZE]]
+        if len(issues) > self.SUMMARY_SIZE:
+            texts.append("{} more".format(len(issues) - self.SUMMARY_SIZE))
+        showMessage("Warning" if level != Qgis.Info else "Info",
+            "{} problems in {} drilling profiles: {}. See the log messages ({}) for details.".format(
+            len(issues), len(profiles), "; ".join(texts), LOG_TAG), level)
+
+        lines = []
+        for (kind, key), (count, ids) in issues:
+            listed = [str(i) for i in list(ids)[:self.MAX_LISTED]]
+            if len(ids) > self.MAX_LISTED:
+                listed.append("...")
+            lines.append("{}: {} layers of {} drilling profiles: {}".format(
+                self._describe(kind, key), count, len(ids), ", ".join(listed)))
+        QgsMessageLog.logMessage("\n".join(lines), LOG_TAG, level)
+
+    def _describe(self, kind, key):
+        """Describe a problem"""
+        return self.KINDS[kind][1].format(key)
@@ -20,7 +20,6 @@
 """
 
 from math import fabs, trunc
-from qgis.PyQt.QtGui import QBrush, QColor, QPen
 from .orientation import Orientation
 from .otbp import Otbp
 
@@ -28,6 +27,8 @@ class Gauge(Otbp):
     """Gauge represents the gauge on the left or bottom of the drawing.
     This class contains all relevant data for drawing"""
 
+    __slots__ = ('_x', '_y', '_min', '_max', '_stepWidth', '_width', '_orientation')
+
     def __init__(self, x, y, minV, maxV, orientation):
         """Initialize the connector"""
         super().__init__()
@@ -48,12 +49,12 @@ class Gauge(Otbp):
 
         return [self._width + 1, 5]
 
-    def paint(self, scene):
+    def paint(self, items):
         """Paint the guage onto the scene"""
         if self._orientation == Orientation.VERTICAL:
-            self._paintVertical(scene)
+            self._paintVertical(items)
         else:
-            self._paintHorizontal(scene)
+            self._paintHorizontal(items)
 
     def _adjustMinMax(self, minV, maxV):
         """Adjust the min and max value for a nice gauge"""
@@ -100,79 +101,66 @@ class Gauge(Otbp):
                 self._stepWidth = (trunc(self._stepWidth / mult) + 1) * mult
             self._max = self._min + 5 * self._stepWidth
 
-    def _paintHorizontal(self, scene):
+    def _paintHorizontal(self, items):
         """Paint the horizontal gauge"""
         w = fabs(self._max - self._min) * self._xFac * 10
         x = self._x * self._xFac * 10
         y = (-self._y * self._yFac) * 10 + 70
 
-        self._paintHorizontalDescription(scene, x, y, w)
+        self._paintHorizontalDescription(items, x, y, w)
 
-        pen, bBrush, wBrush = self._getPenAndBrush()
         sw = self._stepWidth * self._xFac * 10
-        scene.addRect(x, y, sw, self._width * 10, pen, bBrush)
-        scene.addRect(x + sw, y, sw, self._width * 10, pen, wBrush)
-        scene.addRect(x + 2 * sw, y, sw, self._width * 10, pen, bBrush)
-        scene.addRect(x + 3 * sw, y, sw, self._width * 10, pen, wBrush)
-        scene.addRect(x + 4 * sw, y, sw, self._width * 10, pen, bBrush)
+        items.rect('stripe0', x, y, sw, self._width * 10, "black")
+        items.rect('stripe1', x + sw, y, sw, self._width * 10, "white")
+        items.rect('stripe2', x + 2 * sw, y, sw, self._width * 10, "black")
+        items.rect('stripe3', x + 3 * sw, y, sw, self._width * 10, "white")
+        items.rect('stripe4', x + 4 * sw, y, sw, self._width * 10, "black")
 
-    def _paintHorizontalDescription(self, scene, x, y, w):
+    def _paintHorizontalDescription(self, items, x, y, w):
         """Paint the description of the horizontal gauge"""
         # left
         y = y + (self._width + 1) * 10
-        scene.addLine(x, y, x, y + 20)
-        n = scene.addText("{:.2f} m".format(float(self._min) / 100))
-        n.adjustSize()
+        items.line('minLine', x, y, x, y + 20)
+        n = items.text('min', "{:.2f} m".format(float(self._min) / 100))
         n.setX(x - n.boundingRect().width() / 2)
         n.setY(y + 20 + 1)
 
         # right
         x = x + w
-        scene.addLine(x, y, x, y + 20)
-        n = scene.addText("{:.2f} m".format(float(self._max) / 100))
-        n.adjustSize()
+        items.line('maxLine', x, y, x, y + 20)
+        n = items.text('max', "{:.2f} m".format(float(self._max) / 100))
         n.setX(x - n.boundingRect().width() / 2)
         n.setY(y + 20 + 1)
 
-    def _paintVertical(self, scene):
+    def _paintVertical(self, items):
         """Pain the vertial gauge"""
         h = -fabs(self._max - self._min) * self._yFac * 10
         x = self._x * self._xFac * 10 - 80
         y = -self._y * self._yFac * 10
 
-        self._paintVerticalDescription(scene, x, y, h)
+        self._paintVerticalDescription(items, x, y, h)
 
-        pen, bBrush, wBrush = self._getPenAndBrush()
         sw = -self._stepWidth * self._yFac * 10
-        scene.addRect(x, y, self._width * 10, sw, pen, bBrush)
-        scene.addRect(x, y + 1 * sw, self._width * 10, sw, pen, wBrush)
-        scene.addRect(x, y + 2 * sw, self._width * 10, sw, pen, bBrush)
-        scene.addRect(x, y + 3 * sw, self._width * 10, sw, pen, wBrush)
-        scene.addRect(x, y + 4 * sw, self._width * 10, sw, pen, bBrush)
+        items.rect('stripe0', x, y, self._width * 10, sw, "black")
+        items.rect('stripe1', x, y + 1 * sw, self._width * 10, sw, "white")
+        items.rect('stripe2', x, y + 2 * sw, self._width * 10, sw, "black")
+        items.rect('stripe3', x, y + 3 * sw, self._width * 10, sw, "white")
+        items.rect('stripe4', x, y + 4 * sw, self._width * 10, sw, "black")
 
-    def _paintVerticalDescription(self, scene, x, y, h):
+    def _paintVerticalDescription(self, items, x, y, h):
         """Paint the description of the vertical gauge"""
         # top
         x = x - 10
         y = y + h
-        n = scene.addText("{:.2f} m".format(float(self._max) / 100))
-        n.adjustSize()
+        n = items.text('max', "{:.2f} m".format(float(self._max) / 100))
         xLeft = x - n.textWidth()
         n.setX(xLeft)
         n.setY(y)
-        scene.addLine(xLeft, y, x, y)
+        items.line('maxLine', xLeft, y, x, y)
 
         # bottom
         y = y - h
-        n = scene.addText("{:.2f} m".format(float(self._min) / 100))
-        n.adjustSize()
+        n = items.text('min', "{:.2f} m".format(float(self._min) / 100))
         n.setX(xLeft)
         n.setY(y - n.boundingRect().height() - 2)
-        scene.addLine(xLeft, y, x, y)
-
-    def _getPenAndBrush(self):
-        """Get the pen and brush"""
-        pen = QPen()
-        blackBrush = QBrush(QColor("black"))
-        whiteBrush = QBrush(QColor("white"))
-        return pen, blackBrush, whiteBrush
+        items.line('minLine', xLeft, y, x, y)
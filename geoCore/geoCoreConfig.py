@@ -22,9 +22,49 @@
 import os
 import yaml
 
+class ColorEntry:
+    """A color defined in geoCore.yml"""
+
+    def __init__(self, cfg):
+        """Initialize the entry from the color's configuration"""
+        self.code = cfg.get('code')
+        self.texture = cfg.get('texture')
+        self.longname = cfg.get('longname')
+
+class LookupTables:
+    """Lookup tables compiled from geoCore.yml. All tables are flat
+    dictionaries keyed by the shortname used in the layer data."""
+
+    def __init__(self, geoCore):
+        """Compile the tables from the contents of geoCore.yml"""
+        boxes = self._entries(geoCore, 'boxes')
+        self.boxWidths = {k: v['width'] for k, v in boxes.items() if 'width' in v}
+        self.boxNames = {k: v['longname'] for k, v in boxes.items() if 'longname' in v}
+        descriptions = self._entries(geoCore, 'descriptions')
+        self.descriptions = {k: v['longname'] for k, v in descriptions.items() if 'longname' in v}
+        self.facies = dict(self._section(geoCore, 'facies'))
+        self.colors = {k: ColorEntry(v) for k, v in self._entries(geoCore, 'colors').items()}
+
+    def _section(self, geoCore, name):
+        """Return a section of geoCore.yml"""
+        if not isinstance(geoCore, dict) or not isinstance(geoCore.get(name), dict):
+            return {}
+        return geoCore[name]
+
+    def _entries(self, geoCore, name):
+        """Return the entries of a section which are dictionaries themselves"""
+        return {k: v for k, v in self._section(geoCore, name).items() if isinstance(v, dict)}
+
 class Config:
     """Class providing configuration data for plugin. The callback function
-    showMessage(title, message) is used to show error messages."""
+    showMessage(title, message) is used to show error messages.
+    The YML files are parsed once and only read again if they were modified.
+    The parsed contents are shared by all instances and must not be changed."""
+
+    # file name -> (modification time, contents)
+    _files = {}
+    # geoCore.yml's contents and the lookup tables compiled from it
+    _tables = (None, None)
 
     def __init__(self, showMessage):
         self.showMessage = showMessage
@@ -32,15 +72,33 @@ class Config:
 
         self.settings = self._readConfig(os.path.join(self.myDir, "config", "config.yml"))
         self.geoCore = self._readConfig(os.path.join(self.myDir, "config/geoCore", "geoCore.yml"))
+        self.tables = self._compileTables(self.geoCore)
 
     def _readConfig(self, fileName):
         """Return a YML file's contents.
         The file is assumed to be encoded in utf-8"""
         try:
+            stat = os.stat(fileName)
+            mtime = (stat.st_mtime_ns, stat.st_size)
+            cached = Config._files.get(fileName)
+            if (cached is not None) and cached[0] == mtime:
+                return cached[1]
+
             with open(fileName, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                contents = yaml.safe_load(f)
+            Config._files[fileName] = (mtime, contents)
+            return contents
         except yaml.parser.ParserError as pe:
             self.showMessage("Error", "Failed to parse YML: {0}".format(pe))
         except FileNotFoundError:
             self.showMessage("Error", "File {0} was not found.".format(fileName))
         return None
+
+    def _compileTables(self, geoCore):
+        """Return the lookup tables for the given contents of geoCore.yml.
+        The tables are only compiled again if geoCore.yml was reloaded."""
+        source, tables = Config._tables
+        if (tables is None) or (source is not geoCore):
+            tables = LookupTables(geoCore)
+            Config._tables = (geoCore, tables)
+        return tables
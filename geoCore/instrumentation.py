@@ -0,0 +1,207 @@
+""" This module contains the class StageTimer
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from qgis.core import Qgis, QgsMessageLog
+
+# tag of the measurements in the message log
+LOG_TAG = "geoCore"
+
+# timers measuring memory, tracing is stopped when the last one is closed
+_tracers = {"count": 0, "started": False}
+_tracersLock = threading.Lock()
+
+def _startTracing():
+    """Start tracing memory unless it is on already"""
+    with _tracersLock:
+        if (_tracers["count"] == 0) and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracers["started"] = True
+        _tracers["count"] = _tracers["count"] + 1
+
+def _stopTracing():
+    """Stop tracing memory when no timer needs it anymore,
+    unless it was started by someone else"""
+    with _tracersLock:
+        _tracers["count"] = _tracers["count"] - 1
+        if (_tracers["count"] == 0) and _tracers["started"]:
+            tracemalloc.stop()
+            _tracers["started"] = False
+
+class StageTimer:
+    """This class measures the stages of an action (e.g. drawing or export):
+    wall time, counts (features, items, ...) and peak memory of each stage.
+    The measurement is turned on by the setting 'timing' of config.yml, the
+    results are written to the message log and appended to the JSON-lines
+    file 'timingLog' if given. If turned off all methods do (almost) nothing.
+
+    Stages may be nested or interleaved (e.g. generators pulling from each
+    other), the time of a stage excludes the stages running within it. A
+    timer may be used by several threads, each has its own nesting.
+
+    The peak memory is derived from tracemalloc's process-wide traced memory:
+    if a new maximum was reached while the stage was running, it is the
+    stage's peak, otherwise the memory in use when the stage started or
+    stopped. Thus it is a lower bound, and stages running on several threads
+    at once share their peaks. Since tracing slows Python down the wall times
+    are higher meanwhile."""
+
+    def __init__(self, action, settings, **info):
+        """Initialize the timer of the given action. The settings are those of
+        config.yml, info is additional information reported (e.g. features=10)."""
+        self.enabled = bool(settings.get("timing", False))
+        self.action = action
+        self.info = info
+        self._logFile = settings.get("timingLog")
+        self._stages = {} # name -> {"seconds": ..., "peakMemory": ..., counts}
+        self._running = threading.local() # per thread: [[name, start, memory, peak], ...]
+        self._lock = threading.Lock()
+        self._tracing = self.enabled
+        if self._tracing:
+            _startTracing()
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """Measure the code within the with-statement as the given stage"""
+        if not self.enabled:
+            yield
+            return
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+            self.count(name, **counts)
+
+    def iterate(self, name, iterable, countAs=None):
+        """Return the iterable, measuring the time spent fetching each item as the
+        given stage. The items are counted as countAs unless this is None."""
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iter(iterable), countAs)
+
+    def _iterate(self, name, iterator, countAs):
+        """Generator of iterate()"""
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator, StopIteration)
+            finally:
+                self._exit()
+            if item is StopIteration:
+                return
+            if countAs is not None:
+                self.count(name, **{countAs: 1})
+            yield item
+
+    def count(self, name, **counts):
+        """Add the counts to the given stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self._stage(name)
+            for k, v in counts.items():
+                stage[k] = stage.get(k, 0) + v
+
+    def _stage(self, name):
+        """Get the record of a stage (lock held)"""
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = {"seconds": 0.0, "peakMemory": 0}
+            self._stages[name] = stage
+        return stage
+
+    def _stack(self):
+        """Get the stages running on the current thread"""
+        if not hasattr(self._running, "stack"):
+            self._running.stack = []
+        return self._running.stack
+
+    def _enter(self, name):
+        """Pause the stage running on this thread and start the given one"""
+        stack = self._stack()
+        snapshot = self._pause(stack)
+        stack.append([name] + snapshot)
+
+    def _exit(self):
+        """Stop the innermost stage and resume the one it was running in"""
+        stack = self._stack()
+        snapshot = self._pause(stack)
+        stack.pop()
+        if len(stack) > 0:
+            stack[-1][1:] = snapshot
+
+    def _pause(self, stack):
+        """Add the time and memory since the last start to the innermost stage.
+        Return the snapshot [time, memory, peak] the next stage starts with."""
+        now = time.perf_counter()
+        memory, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        if len(stack) > 0:
+            name, start, startMemory, startPeak = stack[-1]
+            # the peak is not reset, that would disturb other threads (see class)
+            used = peak if peak > startPeak else max(memory, startMemory)
+            with self._lock:
+                stage = self._stage(name)
+                stage["seconds"] = stage["seconds"] + (now - start)
+                stage["peakMemory"] = max(stage["peakMemory"], used)
+        return [now, memory, peak]
+
+    def close(self):
+        """Release the tracing of memory, it stops when all timers are closed.
+        This is done by report(), a measurement which is not reported must be
+        closed."""
+        if self._tracing:
+            self._tracing = False
+            _stopTracing()
+
+    def report(self, **info):
+        """Finish the measurement and report the results.
+        The parameter info is added to the reported information."""
+        if not self.enabled:
+            return
+        self.close()
+        self.info.update(info)
+        with self._lock:
+            stages = {k: dict(v) for k, v in self._stages.items()}
+
+        lines = ["{} ({})".format(self.action, ", ".join("{}: {}".format(k, v) for k, v in self.info.items()))]
+        for name, stage in stages.items():
+            counts = ", ".join("{}: {}".format(k, v) for k, v in stage.items()
+                if k not in ("seconds", "peakMemory"))
+            lines.append("  {}: {:.3f} s, peak {:.1f} MB{}".format(name, stage["seconds"],
+                stage["peakMemory"] / 1e6, ", " + counts if len(counts) > 0 else ""))
+        QgsMessageLog.logMessage("\n".join(lines), LOG_TAG, Qgis.Info)
+
+        if self._logFile:
+            record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "action": self.action}
+            record.update(self.info)
+            record["stages"] = stages
+            try:
+                with open(os.path.expanduser(self._logFile), "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                QgsMessageLog.logMessage("Failed to write {}: {}".format(self._logFile, e), LOG_TAG, Qgis.Warning)
@@ -0,0 +1,86 @@
+""" This module contains the class LabelItem
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.PyQt.QtCore import QPointF, QRectF, Qt
+from qgis.PyQt.QtGui import QColor, QStaticText
+from qgis.PyQt.QtWidgets import QGraphicsItem
+
+# margin around the text, the same as QGraphicsTextItem's document margin
+MARGIN = 4
+
+# maximum number of cached layouts
+CACHE_SIZE = 4096
+
+class LabelItem(QGraphicsItem):
+    """LabelItem is a lightweight replacement of QGraphicsTextItem for
+    plain text. The layouts are cached and shared by all labels with the
+    same text, width and font, i.e. repeated texts are laid out once."""
+
+    _layouts = {} # (text, width, font key) -> (QStaticText, QRectF)
+
+    def __init__(self, text, width, font):
+        """Initialize the label. The text is wrapped if a width is given."""
+        super().__init__()
+        self._font = font
+        self._staticText, self._rect = self._layout(text, width, font)
+
+    @classmethod
+    def _layout(cls, text, width, font):
+        """Get the cached layout of the text or lay it out"""
+        key = (text, width, font.key())
+        layout = cls._layouts.get(key)
+        if layout is None:
+            staticText = QStaticText(text)
+            staticText.setTextFormat(Qt.PlainText)
+            if width is not None:
+                staticText.setTextWidth(width - 2 * MARGIN)
+            staticText.prepare(font=font)
+            size = staticText.size()
+            w = width if width is not None else size.width() + 2 * MARGIN
+            layout = (staticText, QRectF(0, 0, w, size.height() + 2 * MARGIN))
+            if len(cls._layouts) >= CACHE_SIZE:
+                cls._layouts.clear()
+            cls._layouts[key] = layout
+        return layout
+
+    @classmethod
+    def layoutRect(cls, text, width, font):
+        """Return the bounding rect of a label of the given text, width and font"""
+        return cls._layout(text, width, font)[1]
+
+    @classmethod
+    def clearLayouts(cls):
+        """Drop all cached layouts"""
+        cls._layouts.clear()
+
+    def textWidth(self):
+        """Return the width of the label"""
+        return self._rect.width()
+
+    def boundingRect(self):
+        """Return the label's bounding rect"""
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        """Paint the text"""
+        painter.setFont(self._font)
+        painter.setPen(QColor("black"))
+        painter.drawStaticText(QPointF(MARGIN, MARGIN), self._staticText)
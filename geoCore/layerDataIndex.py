@@ -0,0 +1,156 @@
+""" This module defines the class LayerDataIndex
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from functools import partial
+
+class LayerDataIndex:
+    """Process-wide cache of the layers' attributes (Schichtdaten) keyed by
+    layer id and drilling profile id. The cache survives redraws and drops
+    its entries as soon as the underlying layer signals a change."""
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide index"""
+        if cls._instance is None:
+            cls._instance = LayerDataIndex()
+        return cls._instance
+
+    @staticmethod
+    def key(profileId):
+        """Return a key identifying a profile independently of the id's type,
+        e.g. the id 1 in the drilling layer may be stored as '1' or 1.0 in the
+        layer containing the Schichtdaten"""
+        if isinstance(profileId, float) and profileId.is_integer():
+            profileId = int(profileId)
+        return str(profileId)
+
+    def __init__(self):
+        """Initialize the index"""
+        self._rows = {} # layer id -> {profile key -> list of attribute dictionaries}
+        self._keysOfFeatures = {} # layer id -> {feature id -> profile key}
+        self._layers = {} # layer id -> (layer, name of the id field, connections)
+        self._generations = {} # layer id -> number of invalidations
+
+    def watch(self, layer, dataId):
+        """Start listening to the layer's change signals.
+        The parameter dataId is the name of the field containing the profile id."""
+        layerId = layer.id()
+        if layerId in self._layers:
+            return
+
+        connections = [
+            (layer.featureAdded, partial(self._featureAdded, layerId)),
+            (layer.attributeValueChanged, partial(self._attributeValueChanged, layerId)),
+            (layer.featureDeleted, partial(self._featureDeleted, layerId)),
+            (layer.dataChanged, partial(self.invalidate, layerId)),
+            # feature ids may change when edits are committed or rolled back
+            (layer.afterCommitChanges, partial(self.invalidate, layerId)),
+            (layer.afterRollBack, partial(self.invalidate, layerId)),
+            (layer.willBeDeleted, partial(self.forget, layerId))]
+        for signal, slot in connections:
+            signal.connect(slot)
+
+        self._layers[layerId] = (layer, dataId, connections)
+        self._rows[layerId] = {}
+        self._keysOfFeatures[layerId] = {}
+
+    def lookup(self, layerId, key):
+        """Return the cached attributes of the profile's layers
+        or None if the profile is not cached"""
+        return self._rows.get(layerId, {}).get(key)
+
+    def generation(self, layerId):
+        """Return the generation of the layer's cache, which changes whenever
+        cached data is invalidated"""
+        return self._generations.get(layerId, 0)
+
+    def store(self, layerId, key, rows, featureIds, generation=None):
+        """Cache the attributes of the profile's layers. The parameter featureIds
+        contains the ids of the features the rows were read from. Rows fetched in
+        the background are only stored if the generation of the layer's cache
+        (see generation) has not changed since they were looked up."""
+        if layerId not in self._layers:
+            return
+        if (generation is not None) and (generation != self.generation(layerId)):
+            return
+
+        self._rows[layerId][key] = rows
+        keysOfFeatures = self._keysOfFeatures[layerId]
+        for fid in featureIds:
+            keysOfFeatures[fid] = key
+
+    def invalidate(self, layerId, key=None):
+        """Drop the cached profile or all profiles of the layer if key is None"""
+        if layerId not in self._layers:
+            return
+
+        self._generations[layerId] = self.generation(layerId) + 1
+        if key is None:
+            self._rows[layerId] = {}
+            self._keysOfFeatures[layerId] = {}
+        else:
+            self._rows[layerId].pop(key, None)
+
+    def forget(self, layerId):
+        """Drop the layer's profiles and stop listening to its signals"""
+        if layerId not in self._layers:
+            return
+
+        _, _, connections = self._layers.pop(layerId)
+        for signal, slot in connections:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass # the layer is already gone
+        self._rows.pop(layerId, None)
+        self._keysOfFeatures.pop(layerId, None)
+        self._generations[layerId] = self.generation(layerId) + 1
+
+    def clear(self):
+        """Drop all cached data and stop listening to any layer"""
+        for layerId in list(self._layers):
+            self.forget(layerId)
+
+    def _featureAdded(self, layerId, fid):
+        """Drop the profile the new feature belongs to"""
+        layer, dataId, _ = self._layers[layerId]
+        feature = layer.getFeature(fid)
+        if feature.isValid():
+            self.invalidate(layerId, self.key(feature.attribute(dataId)))
+        else:
+            self.invalidate(layerId)
+
+    def _attributeValueChanged(self, layerId, fid, idx, value):
+        """Drop the profile the changed feature belongs (or now belongs) to"""
+        layer, dataId, _ = self._layers[layerId]
+        key = self._keysOfFeatures[layerId].get(fid)
+        if key is not None:
+            self.invalidate(layerId, key)
+        if layer.fields().at(idx).name() == dataId:
+            self.invalidate(layerId, self.key(value))
+
+    def _featureDeleted(self, layerId, fid):
+        """Drop the profile the deleted feature belonged to"""
+        key = self._keysOfFeatures[layerId].pop(fid, None)
+        if key is not None:
+            self.invalidate(layerId, key)
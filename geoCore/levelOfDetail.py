@@ -0,0 +1,53 @@
+""" This module contains the enum LevelOfDetail
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from enum import Enum, auto
+
+# texts are hidden if their height on screen is less (in pixels)
+MIN_TEXT_HEIGHT = 6
+
+# boxes are drawn without outline if the view's scale is less
+MIN_OUTLINE_SCALE = 0.35
+
+class LevelOfDetail(Enum):
+    """Enum for the level of detail depending on the view's zoom"""
+
+    FULL = auto() # everything is drawn
+    NO_TEXT = auto() # texts are hidden
+    SIMPLE = auto() # texts are hidden, boxes are drawn without outline
+
+    @classmethod
+    def forScale(cls, scale, textHeight):
+        """Get the level of detail for the view's scale. The parameter
+        textHeight is the height of a line of text in scene coordinates."""
+        if scale < MIN_OUTLINE_SCALE:
+            return cls.SIMPLE
+        if scale * textHeight < MIN_TEXT_HEIGHT:
+            return cls.NO_TEXT
+        return cls.FULL
+
+    def showText(self):
+        """Return if texts are shown"""
+        return self == LevelOfDetail.FULL
+
+    def showOutlines(self):
+        """Return if the boxes' outlines are drawn"""
+        return self != LevelOfDetail.SIMPLE
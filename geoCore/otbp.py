@@ -19,16 +19,19 @@
     along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-
 class Otbp:
     """Otbp stands for object to be painted and is the
     base class for all objects (e.g. profiles, connectors and gauges)
-    that will be painted later on."""
+    that will be painted later on. The objects do not depend on Qt,
+    they paint themselves through the SceneItems handed to them."""
+
+    __slots__ = ('_xFac', '_yFac', 'items')
 
     def __init__(self):
         """Initialize the connector"""
         self._xFac = 1.0
         self._yFac = 1.0
+        self.items = None # the SceneItems the object was painted with, see ProfilePainter
 
     def setXFac(self, xFac):
         """Set scaling factor for x-position"""
@@ -42,8 +45,13 @@ class Otbp:
         """Return the height of the object"""
         return 0.0
 
-    def paint(self, scene):
-        """Paint the object onto the scene"""
+    def batchGroup(self):
+        """Return the group whose shapes are merged into common paths
+        (see PathBatches) or None if the object is a group of its own"""
+        return None
+
+    def paint(self, items):
+        """Paint the object using the given SceneItems"""
 
-    def paintDescription(self, scene):
-        """Paint the object's description"""
+    def paintDescription(self, items):
+        """Paint the object's description using the given SceneItems"""
@@ -0,0 +1,68 @@
+""" This module contains the class PaintResources
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.PyQt.QtGui import QBrush, QColor, QPen
+
+class PaintResources:
+    """Process-wide cache of the colours, pens and brushes used for painting.
+    There are only a few distinct colours, thus all objects to be painted
+    share the same Qt objects instead of creating their own."""
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide resources"""
+        if cls._instance is None:
+            cls._instance = PaintResources()
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the resources"""
+        self._colors = {} # colour code -> QColor
+        self._brushes = {} # (colour code, texture) -> QBrush
+        self._pen = QPen()
+
+    def pen(self):
+        """Return the default pen"""
+        return self._pen
+
+    def color(self, code):
+        """Return the colour of the given code (e.g. '#c9c8c8' or 'black')"""
+        color = self._colors.get(code)
+        if color is None:
+            color = QColor(code)
+            self._colors[code] = color
+        return color
+
+    def brush(self, code, texture=''):
+        """Return the brush of the given colour code and texture"""
+        key = (code, texture)
+        brush = self._brushes.get(key)
+        if brush is None:
+            brush = QBrush(self.color(code))
+            self._brushes[key] = brush
+        return brush
+
+    def clear(self):
+        """Drop all resources"""
+        self._colors = {}
+        self._brushes = {}
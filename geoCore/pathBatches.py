@@ -0,0 +1,122 @@
+""" This module contains the class PathBatches
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtGui import QBrush, QPainterPath, QPen
+
+from .levelOfDetail import LevelOfDetail
+
+# kinds of shapes
+RECT = 0
+LINE = 1
+
+# filled paths are drawn below the lines, texts are on top
+RECT_Z_VALUE = -2
+LINE_Z_VALUE = -1
+
+class _Batch:
+    """The shapes drawn with the same pen and brush"""
+
+    def __init__(self, pen, brush):
+        """Initialize the batch"""
+        self.pen = pen
+        self.brush = brush
+        self.shapes = {} # key -> (kind, coordinates...)
+        self.item = None
+
+class PathBatches:
+    """PathBatches merges the rectangles and lines of a group (e.g. a profile)
+    that share the same pen and brush into a single QGraphicsPathItem. Thus
+    the scene contains a few path items per group instead of an item per shape.
+    Changed batches are written to the scene by flush()."""
+
+    def __init__(self, scene):
+        """Initialize the batches of the given scene"""
+        self.scene = scene
+        self._batches = {} # (group, pen, brush) -> _Batch
+        self._dirty = set()
+        self._detail = LevelOfDetail.FULL
+
+    def add(self, group, key, pen, brush, shape):
+        """Add or update a shape of the group, which is a tuple of its kind
+        (RECT or LINE) and its coordinates. Lines have no brush (None).
+        Return the key of the batch containing the shape."""
+        batchKey = (group, id(pen), id(brush))
+        batch = self._batches.get(batchKey)
+        if batch is None:
+            batch = _Batch(pen, brush)
+            self._batches[batchKey] = batch
+        if batch.shapes.get(key) != shape:
+            batch.shapes[key] = shape
+            self._dirty.add(batchKey)
+        return batchKey
+
+    def discard(self, batchKey, key):
+        """Remove a shape from its batch"""
+        batch = self._batches.get(batchKey)
+        if (batch is not None) and (batch.shapes.pop(key, None) is not None):
+            self._dirty.add(batchKey)
+
+    def setDetail(self, detail):
+        """Set the level of detail, i.e. draw the rectangles' outlines or not"""
+        if detail == self._detail:
+            return
+        self._detail = detail
+        for batch in self._batches.values():
+            if (batch.item is not None) and (batch.brush is not None):
+                batch.item.setPen(self._pen(batch))
+
+    def flush(self):
+        """Update the path items of the changed batches"""
+        for batchKey in self._dirty:
+            batch = self._batches[batchKey]
+            if len(batch.shapes) == 0:
+                if batch.item is not None:
+                    self.scene.removeItem(batch.item)
+                del self._batches[batchKey]
+                continue
+
+            path = self._path(batch)
+            if batch.item is None:
+                brush = batch.brush if batch.brush is not None else QBrush()
+                batch.item = self.scene.addPath(path, self._pen(batch), brush)
+                batch.item.setZValue(RECT_Z_VALUE if batch.brush is not None else LINE_Z_VALUE)
+            else:
+                batch.item.setPath(path)
+        self._dirty = set()
+
+    def _path(self, batch):
+        """Build the path of the batch's shapes"""
+        path = QPainterPath()
+        path.setFillRule(Qt.WindingFill) # overlapping rectangles are filled completely
+        for kind, a, b, c, d in batch.shapes.values():
+            if kind == RECT:
+                path.addRect(a, b, c, d)
+            else:
+                path.moveTo(a, b)
+                path.lineTo(c, d)
+        return path
+
+    def _pen(self, batch):
+        """Get the pen of the batch according to the level of detail"""
+        if (batch.brush is not None) and not self._detail.showOutlines():
+            return QPen(Qt.NoPen)
+        return batch.pen
@@ -36,6 +36,11 @@ from qgis.PyQt.QtWidgets import QAction
 from .resources import *
 # Import the code for the dialog
 from .petroProfile_dialog import PetroProfileDialog
+from .boreholeIndex import BoreholeIndex
+from .labelItem import LabelItem
+from .layerDataIndex import LayerDataIndex
+from .paintResources import PaintResources
+from .transectTool import TransectTool
 
 class PetroProfile:
     """QGIS Plugin Implementation."""
@@ -72,6 +77,7 @@ class PetroProfile:
         # Must be set in initGui() to survive plugin reloads
         self.first_start = None
         self.dlg = None
+        self.transectTool = None
 
     # noinspection PyMethodMayBeStatic
     def tr(self, message):
@@ -173,6 +179,17 @@ class PetroProfile:
             callback=self.run,
             parent=self.iface.mainWindow())
 
+        transectAction = self.add_action(
+            ':/images/themes/default/mActionCaptureLine.svg',
+            text=self.tr(u'Draw drilling profiles along a section line'),
+            callback=self.drawTransect,
+            status_tip=self.tr(u'Left click adds a vertex, right click draws the profiles near the line'),
+            parent=self.iface.mainWindow())
+        transectAction.setCheckable(True)
+        self.transectTool = TransectTool(self.iface.mapCanvas())
+        self.transectTool.setAction(transectAction)
+        self.transectTool.transectDrawn.connect(self._transectDrawn)
+
         # will be set False in run()
         self.first_start = True
 
@@ -184,10 +201,30 @@ class PetroProfile:
                 self.tr(u'&geoCore'),
                 action)
             self.iface.removeToolBarIcon(action)
+        if self.transectTool is not None:
+            self.iface.mapCanvas().unsetMapTool(self.transectTool)
+            self.transectTool = None
+        BoreholeIndex.instance().clear()
+        LayerDataIndex.instance().clear()
+        PaintResources.instance().clear()
+        LabelItem.clearLayouts()
+
 
+    def drawTransect(self):
+        """Activate the map tool for drawing a section line"""
+        self.iface.mapCanvas().setMapTool(self.transectTool)
+
+    def _transectDrawn(self, line):
+        """Show the drilling profiles along the section line"""
+        self._showDialog(line)
 
     def run(self):
         """Run method that performs all the real work"""
+        self._showDialog(None)
+
+    def _showDialog(self, line):
+        """Show the dialog drawing the selected drilling profiles or
+        those along the section line if given"""
 
         # Create the dialog with elements (after translation) and keep reference
         # Only create GUI ONCE in callback, so that it will only load
@@ -196,6 +233,7 @@ class PetroProfile:
             self.first_start = False
             self.dlg = PetroProfileDialog(self.iface)
 
+        self.dlg.setTransect(line, self.iface.mapCanvas().mapSettings().destinationCrs())
         # show the dialog
         self.dlg.show()
         # Run the dialog event loop
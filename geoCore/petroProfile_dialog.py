@@ -32,15 +32,19 @@ from pathlib import Path
 from qgis.PyQt import uic
 from qgis.PyQt import QtWidgets
 from qgis.PyQt.QtWidgets import QAction, QActionGroup, QMenu
-from qgis.PyQt.QtWidgets import QFileDialog, QMessageBox
-from qgis.PyQt.QtGui import QPainter, QImage, QColor
-from qgis.PyQt.QtSvg import QSvgGenerator
-from qgis.PyQt.QtCore import QRectF, QEvent
-from qgis.core import Qgis, QgsMessageLog
+from qgis.PyQt.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from qgis.PyQt.QtCore import QEvent, Qt
+from qgis.core import Qgis, QgsApplication, QgsMessageLog
 
+from .geoCoreConfig import Config
+from .instrumentation import StageTimer
+from .levelOfDetail import LevelOfDetail
 from .profileBuilder import ProfileBuilder
 from .profilePainter import ProfilePainter
+from .profileTask import ProfileTask
+from .sceneExporter import SceneExporter
 from .scale_dialog import ScaleDialog
+from .transect import Transect
 
 # This loads your .ui file so that PyQt can populate your plugin
 # with the elements from Qt Designer
@@ -65,6 +69,13 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
         self._setupGeoDirectionActions()
         self._xFac = None
         self._yFac = None
+        self._painter = None
+        self._profiles = None
+        self._task = None
+        self._progress = None
+        self._painted = 0
+        self._timer = None
+        self._transect = None
 
     def _setupScene(self):
         """Set up a new scene"""
@@ -95,6 +106,11 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
         self._ewAction.setEnabled(True)
         self._ewAction.setCheckable(True)
 
+        self._transectAction = QAction("Along the section line", self)
+        self._transectAction.triggered.connect(self.drawProfilesAlongTransect)
+        self._transectAction.setEnabled(False) # see setTransect
+        self._transectAction.setCheckable(True)
+
     def _getActions(self):
         """Get actions that are displayed in the context menu"""
         actions = []
@@ -127,6 +143,9 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
         group.addAction(self._ewAction)
         actions.append(self._ewAction)
 
+        group.addAction(self._transectAction)
+        actions.append(self._transectAction)
+
         sepAbout = QAction("", self)
         sepAbout.setSeparator(True)
         actions.append(sepAbout)
@@ -154,7 +173,20 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
     def showEvent(self, e):
         """Override showEvent"""
         super().showEvent(e)
-        self.drawProfilesNorthSouth()
+        self._profiles = None # the selection or its data may have changed
+        if self._transect is not None:
+            self.drawProfilesAlongTransect()
+        else:
+            self.drawProfilesNorthSouth()
+
+    def setTransect(self, line, crs=None):
+        """Set the section line (a QgsGeometry in the given CRS) the profiles
+        are drawn along when the dialog is shown next. Without a line the
+        selected profiles are drawn from north to south."""
+        self._transect = None
+        if line is not None:
+            self._transect = Transect(line, crs, self._settings().get("transectBuffer", 50))
+        self._transectAction.setEnabled(self._transect is not None)
 
     def wheelEvent(self, e):
         """Zoom in/out"""
@@ -167,6 +199,7 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
         else:
             s = 0.85
         self.view.scale(s, s)
+        self._updateDetail()
 
     def eventFilter(self, obj, e):
         """Filter wheel event"""
@@ -183,14 +216,25 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
         if result:
             self._xFac = dlg.xFac()
             self._yFac = dlg.yFac()
-            if self._nsAction.isChecked():
-                self.drawProfilesNorthSouth()
-            elif self._snAction.isChecked():
-                self.drawProfilesSouthNorth()
-            elif self._weAction.isChecked():
-                self.drawProfilesWestEast()
-            elif self._ewAction.isChecked():
-                self.drawProfilesEastWest()
+            if self._painter is not None:
+                self._painter.setViewSize(self.view.width(), self.view.height())
+                self._painter.rescale(self._xFac, self._yFac)
+                self._fitView()
+            else:
+                self._redraw()
+
+    def _redraw(self):
+        """Draw the profiles in the selected direction"""
+        if self._nsAction.isChecked():
+            self.drawProfilesNorthSouth()
+        elif self._snAction.isChecked():
+            self.drawProfilesSouthNorth()
+        elif self._weAction.isChecked():
+            self.drawProfilesWestEast()
+        elif self._ewAction.isChecked():
+            self.drawProfilesEastWest()
+        elif self._transectAction.isChecked():
+            self.drawProfilesAlongTransect()
 
     def _exportToFile(self):
         """Export drawing to file"""
@@ -200,62 +244,35 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
 
         self._exportWithPainter(name)
 
-    def _svgPaintDevice(self, name, sourceRect, targetRect):
-        """Get QSvgGenerator as paint device"""
-        generator = QSvgGenerator()
-        generator.setDescription("This SVG was generated with the geoCore "
-            "plugin of QGIS, written by T-Systems on site services GmbH")
-        generator.setTitle("geoCore")
-        generator.setSize(sourceRect.size().toSize())
-        generator.setViewBox(targetRect)
-        generator.setFileName(name)
-        return generator
-
-    def _imgPaintDevice(self, sourceRect):
-        """Get QImage as paint device"""
-        img = QImage(sourceRect.width(), sourceRect.height(),
-            QImage.Format_ARGB32)
-        img.fill(QColor("transparent"))
-        return img
-
-    def _getSourceAndTargetRect(self):
-        """Returns the source and target rect for export"""
-        self.scene.clearSelection()
-        margin = 5
-        sourceRect = self.scene.itemsBoundingRect()
-        sourceRect.adjust(-margin, -margin, margin, margin)
-        targetRect = QRectF(0, 0, sourceRect.width(), sourceRect.height())
-        return sourceRect, targetRect
-
     def _exportWithPainter(self, name):
-        """Export as image file"""
+        """Export as image file. SVG files are written straight
+        from the painted objects (see ProfilePainter.writeSvg)."""
+        if self._painter is not None:
+            self._painter.setDetail(LevelOfDetail.FULL) # export everything
+        suffix = Path(name).suffix.lower()
+        timer = self._stageTimer("export", format=suffix)
         try:
-            sourceRect, targetRect = self._getSourceAndTargetRect()
-
-            pd = None
-            if Path(name).suffix.upper() == ".SVG":
-                pd = self._svgPaintDevice(name, sourceRect, targetRect)
-            else:
-                pd = self._imgPaintDevice(sourceRect)
-
-            painter = QPainter()
-            painter.begin(pd)
-            painter.setRenderHint(QPainter.Antialiasing)
-            self.scene.render(painter, targetRect, sourceRect)
-            painter.end()
-            if hasattr(pd, 'save') and callable(pd.save):
-                pd.save(name)
+            with timer.stage("export"):
+                if (suffix == ".svg") and (self._painter is not None):
+                    self._painter.writeSvg(name)
+                else:
+                    SceneExporter(self.scene).export(name)
             QgsMessageLog.logMessage("exported to {}".format(name),
                 level=Qgis.Info)
+            if timer.enabled:
+                timer.report(items=len(self.scene.items()), bytes=os.path.getsize(name))
         except IOError:
             self.showMessage("Error", "Failed to export to {}".format(name),
                 Qgis.Critical)
+        finally:
+            timer.close()
+            self._updateDetail()
 
     def _getFilename(self):
         """Get file name via file dialog"""
         home = str(Path.home())
         name = QFileDialog.getSaveFileName(self, "Export to file", home,
-            "Vector graphics (*.svg);;Images (*.png *.jpg)")
+            "Vector graphics (*.svg);;Images (*.png *.jpg *.tif)")
 
         if (name is None) or (len(name[0]) == 0):
             return None
@@ -294,18 +311,154 @@ class PetroProfileDialog(QtWidgets.QDialog, FORM_CLASS):
         crit = lambda f: -f.attribute('xcoord') # east -> west
         self._drawProfiles(crit)
 
+    def drawProfilesAlongTransect(self):
+        """Draw the profiles near the section line (see setTransect)
+        positioned at their chainage. They are selected on the map."""
+        self._transectAction.setChecked(True)
+        layer = self.iface.activeLayer()
+        if not layer.isSpatial():
+            self.showMessage("Error", "Layer {} has no geometries.".format(layer.name()), Qgis.Critical)
+            return
+
+        try:
+            features, positions = self._transect.select(layer)
+        except ValueError as e:
+            self.showMessage("Error", str(e), Qgis.Critical)
+            return
+        layer.selectByIds([f.id() for f in features])
+        self._drawFeatures(features, positions)
+
     def _drawProfiles(self, sortCrit):
-        """Draw the selected drilling profiles"""
+        """Draw the selected drilling profiles in the given order"""
+        self._drawFeatures(self._getSortedDrillingPositions(sortCrit))
+
+    def _drawFeatures(self, features, positions=None):
+        """Draw the drilling profiles of the features in the given order. The
+        x-positions may be given (see ProfileBuilder.arrangeProfiles).
+        The profiles of the features are only built once. If just the
+        direction changes the profiles are rearranged and merely the connectors
+        and gauges are constructed again."""
+        if (self._profiles is None) or (set(self._profiles) != {f.id() for f in features}):
+            self._buildProfiles(features, positions)
+            return
+
+        timer = self._stageTimer("draw", features=len(features), cached=True)
+        try:
+            builder = ProfileBuilder(self.iface.activeLayer().name(),
+                self.showMessage)
+            with timer.stage("connectors"):
+                pac = builder.arrangeProfiles(features, [self._profiles[f.id()] for f in features], positions)
+            timer.count("connectors", objects=len(pac))
+            self._painter.setViewSize(self.view.width(), self.view.height())
+            self._painter.applyScale(self._xFac, self._yFac)
+            with timer.stage("scene"):
+                self._painter.paint(pac, len(pac) == 1)
+            self._fitView()
+            if timer.enabled:
+                timer.report(items=len(self.scene.items()))
+        finally:
+            timer.close()
+
+    def _buildProfiles(self, features, positions=None):
+        """Build the profiles of the features in the background.
+        Every profile is drawn as soon as it is built."""
+        if self._task is not None:
+            self._task.cancel()
+        if self._timer is not None:
+            self._timer.close() # the canceled task is not reported
+
+        self._timer = self._stageTimer("draw", features=len(features), cached=False)
+        task = ProfileTask(self.iface.activeLayer().name(), features, self.showMessage,
+            lambda profiles: self._profilesBuilt(task, profiles), self._timer, positions)
+        task.taskTerminated.connect(lambda: self._taskTerminated(task))
+        task.otbpBuilt.connect(lambda _: self._paintBuilt(task))
+        self._task = task
+
         self.scene.clear()
-        features = self._getSortedDrillingPositions(sortCrit)
-        builder = ProfileBuilder(self.iface.activeLayer().name(),
-            self.showMessage)
-        pac = builder.getProfilesAndConnectors(features)
-        painter = ProfilePainter(self.scene, self.view.width(), self.view.height())
-        painter.applyScale(self._xFac, self._yFac)
-        painter.paint(pac, len(pac) == 1)
+        self._profiles = None
+        self._painter = ProfilePainter(self.scene, self.view.width(), self.view.height())
+        self._painter.setMinBoxHeight(self._settings().get("minBoxHeight", 0))
+        self._painter.applyScale(self._xFac, self._yFac)
+        self._painter.begin(len(features) == 1, task.positions)
+        self._painted = 0
+
+        if self._progress is None:
+            self._progress = QProgressDialog("Building drilling profiles...", "Cancel", 0, 100, self)
+            self._progress.setWindowModality(Qt.WindowModal)
+            self._progress.setMinimumDuration(500)
+            self._progress.canceled.connect(self._cancelTask)
+        self._progress.setValue(0)
+        task.progressChanged.connect(lambda progress: self._taskProgress(task, progress))
+
+        QgsApplication.taskManager().addTask(task)
+
+    def _taskProgress(self, task, progress):
+        """Show the progress of the current task"""
+        if task is self._task:
+            self._progress.setValue(int(progress))
+
+    def _cancelTask(self):
+        """Cancel the current task"""
+        if self._task is not None:
+            self._task.cancel()
+
+    def _paintBuilt(self, task):
+        """Paint the objects the current task has built so far"""
+        if task is not self._task:
+            return # outdated
+
+        otbps = task.otbps[self._painted:]
+        with self._timer.stage("scene"):
+            for o in otbps:
+                self._painter.add(o)
+        if (self._painted == 0) and (len(otbps) > 0):
+            self._fitView() # show the first profile right away
+        self._painted = self._painted + len(otbps)
+
+    def _finishPainting(self, task):
+        """Paint the remaining objects of the task and apply the final scaling"""
+        self._paintBuilt(task)
+        self._task = None
+        self._progress.reset()
+        self._painter.setViewSize(self.view.width(), self.view.height())
+        with self._timer.stage("scene"):
+            self._painter.end(len(task.otbps) == 1)
+        self._fitView()
+        if self._timer.enabled:
+            self._timer.report(items=len(self.scene.items()), canceled=task.isCanceled())
+
+    def _taskTerminated(self, task):
+        """Keep what has been painted if the task was canceled or failed"""
+        if task is self._task:
+            self._finishPainting(task)
+
+    def _profilesBuilt(self, task, profiles):
+        """Finish the drawing and keep the profiles built by the task"""
+        if task is not self._task:
+            return # outdated
+
+        self._finishPainting(task)
+        self._profiles = {f.id(): p for f, p in zip(task.features, profiles)}
+
+    def _fitView(self):
+        """Reset the view's zoom and fit it to the scene's items"""
         self.view.resetTransform()
         self.view.setSceneRect(self.scene.itemsBoundingRect())
+        self._updateDetail()
+
+    def _updateDetail(self):
+        """Adapt the drawing's level of detail to the view's zoom"""
+        if self._painter is not None:
+            self._painter.setViewScale(self.view.transform().m11())
+
+    def _settings(self):
+        """Get the settings of config.yml"""
+        settings = Config(lambda title, message: self.showMessage(title, message, Qgis.Critical)).settings
+        return settings if settings is not None else {}
+
+    def _stageTimer(self, action, **info):
+        """Get a StageTimer measuring the given action if turned on in config.yml"""
+        return StageTimer(action, self._settings(), **info)
 
     def _getSortedDrillingPositions(self, crit):
         """Sort profiles using given criterium"""
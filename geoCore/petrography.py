@@ -0,0 +1,68 @@
+""" This module contains the parser for the petrography notation
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import re
+from functools import lru_cache
+
+# number of distinct petrographies kept in the cache
+CACHE_SIZE = 4096
+
+_mainGroupPattern = re.compile(r"\w*", re.IGNORECASE)
+_tokenPattern = re.compile(r"[(),]|[^(),]+")
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parsePetrography(petro):
+    """Split the given Petrographie into Großgruppe and Kleingruppe.
+    The notation is
+
+        petrography := Großgruppe [ "(" list ")" ]
+        list        := item { "," item }
+        item        := Kleingruppe [ "(" list ")" ]
+
+    i.e. Kleingruppen may be nested, e.g. U(fs(u1)). Nested Kleingruppen
+    are flattened in reading order, so U(fs(u1)) yields ('U', ('fs', 'u1')).
+    Anything following the closing parenthesis of the outermost list is
+    ignored, a missing closing parenthesis is tolerated. Return (None, ())
+    if petro is not a string."""
+    if not isinstance(petro, str):
+        return (None, ())
+
+    gg = _mainGroupPattern.match(petro).group(0) # Großgruppe
+    rest = petro[len(gg):].lstrip()
+    if not rest.startswith("("):
+        return (gg, ())
+
+    # Since nested lists are flattened it is sufficient to track the depth
+    # of nesting instead of descending recursively.
+    kg = [] # Kleingruppe
+    depth = 0
+    for token in _tokenPattern.findall(rest):
+        if token == "(":
+            depth = depth + 1
+        elif token == ")":
+            depth = depth - 1
+            if depth == 0:
+                break
+        elif token != ",":
+            token = token.strip()
+            if token != '':
+                kg.append(token)
+    return (gg, tuple(kg))
@@ -19,13 +19,14 @@
     along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from functools import reduce
 from .otbp import Otbp
 
 class Profile(Otbp):
     """Profile represents a petrographic drilling profile.
     This class contains all relevant data for drawing"""
 
+    __slots__ = ('x', 'y', 'margin', 'name', 'boxes', 'drawnBoxes', '_heights', '_depths')
+
     def __init__(self, name):
         """Initialize the profile"""
         super().__init__()
@@ -33,43 +34,68 @@ class Profile(Otbp):
         self.y = 0.0 # in cm
         self.margin = 1 # margin for description
         self.name = name
-        self.boxes = []
+        self.boxes = [] # use addBox to add boxes
+        self.drawnBoxes = None # the boxes drawn instead of boxes, see BoxAggregator
+        self._heights = [] # height of each box
+        self._depths = [] # depth of each box's bottom relative to y
+
+    def addBox(self, box):
+        """Append a box at the bottom of the profile"""
+        depth = self._depths[-1] if len(self._depths) > 0 else 0.0
+        self.boxes.append(box)
+        self._heights.append(box.height)
+        self._depths.append(depth + box.height)
 
     def height(self):
         """Return the height of the profile"""
-        return reduce(lambda x, y: x + y, [b.height for b in self.boxes])
+        return self._depths[-1] if len(self._depths) > 0 else 0.0
+
+    def top(self, i):
+        """Return the y-coordinate (elevation) of the i-th box's top"""
+        return self.y - self._depths[i - 1] if i > 0 else self.y
+
+    def bottom(self, i=-1):
+        """Return the y-coordinate (elevation) of the i-th box's bottom.
+        By default the bottom of the profile is returned."""
+        return self.y - self._depths[i] if len(self._depths) > 0 else self.y
 
     def partsHeights(self):
-        """Return the height of each box"""
-        return [b.height for b in self.boxes]
+        """Return the height of each box. The list must not be changed."""
+        return self._heights
 
     def setYFac(self, yFac):
         """Set scaling factor for y-dimension"""
         super().setYFac(yFac)
         for b in self.boxes:
             b.setYFac(yFac)
+        if self.drawnBoxes is not None:
+            for b in self.drawnBoxes:
+                b.setYFac(yFac)
+
+    def _drawn(self):
+        """Return the boxes to be drawn"""
+        return self.drawnBoxes if self.drawnBoxes is not None else self.boxes
 
-    def paint(self, scene):
+    def paint(self, items):
         """Paint boxes onto scene"""
-        self._paintName(scene)
-        self._paintLegend(scene)
-        for b in self.boxes:
-            b.paint(scene, self.x * self._xFac)
+        self._paintName(items)
+        self._paintLegend(items)
+        for b in self._drawn():
+            b.paint(items, self.x * self._xFac)
 
-    def _paintLegend(self, scene):
+    def _paintLegend(self, items):
         """Paint legend explaining the width of the individual
         layers/boxes below the profile"""
-        yBottom = self.y - self.height()
+        yBottom = self.bottom()
         yPos = (yBottom * self._yFac - self.margin) * -10 # cm to mm
-        for b in self.boxes:
+        for b in self._drawn():
             xPos = (self.x * self._xFac + b.width) * 10
-            scene.addLine(xPos, yPos, xPos, yPos + 20)
-            n = scene.addText(b.name)
-            n.adjustSize()
+            items.line((b, 'legend'), xPos, yPos, xPos, yPos + 20)
+            n = items.text((b, 'legendName'), b.name)
             n.setX(xPos - n.boundingRect().width() / 2)
             n.setY(yPos + 20 + self.margin)
 
-    def paintDescription(self, scene):
+    def paintDescription(self, items):
         """Paint description
         A profile drawing with description consists of
         three columns. The left column contains the heights
@@ -80,52 +106,49 @@ class Profile(Otbp):
         individual layers (unit cm) relative to the surface height
         as well as a description of the layer's petrology.
         """
-        self._paintRightDescription(scene)
-        self._paintLeftDescription(scene)
+        self._paintRightDescription(items)
+        self._paintLeftDescription(items)
 
-    def _paintName(self, scene):
+    def _paintName(self, items):
         """Paint the profile's name"""
         if len(self.boxes) == 0:
             return
 
-        n = scene.addText("{}".format(self.name)) # name might be an int
-        n.adjustSize()
+        n = items.text('name', "{}".format(self.name)) # name might be an int
         n.setX(self.x * self._xFac * 10) # cm to mm
         n.setY(-self.y * self._yFac * 10 - n.boundingRect().height())
 
-    def _paintLeftDescription(self, scene):
+    def _paintLeftDescription(self, items):
         """Paint left column of the description"""
         if len(self.boxes) == 0:
             return
 
         yTop = self.y
-        top = scene.addText("{:.2f} m".format(float(yTop) / 100))
-        top.adjustSize()
+        top = items.text('top', "{:.2f} m".format(float(yTop) / 100))
         xpos = (self.x * self._xFac * 10) - top.textWidth() - (self.margin * 10) # cm to mm
         ypos = -yTop * self._yFac * 10 # cm to mm
         top.setX(xpos)
         top.setY(ypos - 2)
-        scene.addLine(xpos, ypos, 10 * (self.x * self._xFac - self.margin), ypos)
+        items.line('topLine', xpos, ypos, 10 * (self.x * self._xFac - self.margin), ypos)
 
-        yBottom = self.y - self.height()
-        bottom = scene.addText("{:.2f} m".format(float(yBottom) / 100))
-        bottom.adjustSize()
+        yBottom = self.bottom()
+        bottom = items.text('bottom', "{:.2f} m".format(float(yBottom) / 100))
         xpos = (self.x * self._xFac * 10) - bottom.textWidth() - (self.margin * 10) # cm to mm
         ypos = -yBottom * self._yFac * 10 - (bottom.boundingRect().height() - 2) # cm to mm
         bottom.setX(xpos)
         bottom.setY(ypos)
         ypos = -yBottom * self._yFac * 10
-        scene.addLine(xpos, ypos, 10 * (self.x * self._xFac - self.margin), ypos)
+        items.line('bottomLine', xpos, ypos, 10 * (self.x * self._xFac - self.margin), ypos)
 
-    def _paintRightDescription(self, scene):
+    def _paintRightDescription(self, items):
         """Paint the right column of the description."""
         # x-position on the right
-        w = max(self.boxes, key=lambda b: b.width)
+        w = max(self._drawn(), key=lambda b: b.width)
         if w is not None:
             w = w.width
         else:
             w = 20
         xpos = self.x * self._xFac + w + self.margin
 
-        for b in self.boxes:
-            b.paintDescription(scene, xpos)
+        for b in self._drawn():
+            b.paintDescription(items, xpos)
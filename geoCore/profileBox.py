@@ -19,13 +19,16 @@
     along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from qgis.PyQt.QtGui import QBrush, QColor, QPen
 #from qgis.core import Qgis, QgsMessageLog
 
 class ProfileBox:
     """ProfileBox represents one layer of a petrographic drilling profile.
     This class contains all relevant data for drawing"""
 
+    # large sections consist of a lot of boxes
+    __slots__ = ('layer', 'group', 'y', '_yFac', 'width', 'height', 'depth', 'name', 'info',
+        'color', 'texture', 'isFirst', 'isLast')
+
     def __init__(self, layer):
         """Initialize the box"""
         self.layer = layer
@@ -46,47 +49,45 @@ class ProfileBox:
         """Set scaling factor for y-dimension"""
         self._yFac = yFac
 
-    def paint(self, scene, xpos):
-        """Paint box onto scene"""
-        pen, brush = self._getPenAndBrush()
+    def paint(self, items, xpos):
+        """Paint box onto scene. The parameter items are the
+        SceneItems of the profile the box belongs to."""
         x, y, w, h = self._getPosAndDims(xpos)
-        scene.addRect(x, y, w, h, pen, brush)
+        items.rect((self, 'box'), x, y, w, h, self.color, self.texture)
 
-    def paintDescription(self, scene, xpos):
+    def paintDescription(self, items, xpos):
         """Paint description"""
-        width = self._paintDepthMark(scene, xpos)
+        width = self._paintDepthMark(items, xpos)
         if self.isFirst:
-            self._paintTopDepthMark(scene, xpos)
-        self._paintInfo(scene, xpos, width)
+            self._paintTopDepthMark(items, xpos)
+        self._paintInfo(items, xpos, width)
 
-    def _paintTopDepthMark(self, scene, xpos):
+    def _paintTopDepthMark(self, items, xpos):
         """Paint depth at the top of the layer"""
         x, y, _, _ = self._getPosAndDims(xpos)
-        d = scene.addText("{:.2f} cm".format(float(self.depth - self.height)))
-        d.adjustSize()
+        d = items.text((self, 'topDepth'), "{:.2f} cm".format(float(self.depth - self.height)))
         d.setX(x)
         d.setY(y - (d.boundingRect().height() - 2))
 
-        scene.addLine(x, y, x + d.boundingRect().width(), y)
+        items.line((self, 'topDepthLine'), x, y, x + d.boundingRect().width(), y)
 
-    def _paintDepthMark(self, scene, xpos):
+    def _paintDepthMark(self, items, xpos):
         """Paint depth at the bottom of the layer box"""
         x, y, _, h = self._getPosAndDims(xpos)
-        d = scene.addText("{:.2f} cm".format(float(self.depth)))
-        d.adjustSize()
+        d = items.text((self, 'depth'), "{:.2f} cm".format(float(self.depth)))
         d.setX(x)
         d.setY(y + h - (d.boundingRect().height() - 2))
 
-        scene.addLine(x, y + h, x + d.boundingRect().width(), y + h)
+        items.line((self, 'depthLine'), x, y + h, x + d.boundingRect().width(), y + h)
         return d.boundingRect().width()
 
-    def _paintInfo(self, scene, xpos, xoffset):
-        """Paint the info text"""
+    def _paintInfo(self, items, xpos, xoffset):
+        """Paint the info text and return its item"""
         x, y, _, _ = self._getPosAndDims(xpos)
-        t = scene.addText(self.info)
+        t = items.text((self, 'info'), self.info, 200)
         t.setX(x + xoffset)
         t.setY(y)
-        t.setTextWidth(200)
+        return t
 
     def _getPosAndDims(self, xpos):
         """Scales the position (x, y) as well as width and height"""
@@ -96,10 +97,3 @@ class ProfileBox:
         w = self.width * 10
         h = self.height * self._yFac * 10
         return x, y, w, h
-
-    def _getPenAndBrush(self):
-        """Get the pen and brush"""
-        col = QColor(self.color)
-        pen = QPen()
-        brush = QBrush(col)
-        return pen, brush
@@ -19,7 +19,7 @@
     along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import re
+from functools import lru_cache
 from math import sqrt
 from sys import maxsize
 from qgis.core import Qgis, QgsExpression, QgsFeatureRequest, QgsProject
@@ -29,94 +29,239 @@ from qgis.PyQt.QtCore import QVariant
 from .geoCoreConfig import Config
 from .profile import Profile
 from .profileBox import ProfileBox
-from .connector import Connector
+from .connectorEngine import ConnectorEngine
+from .diagnostics import Diagnostics
 from .orientation import Orientation
 from .gauge import Gauge
+from .layerDataIndex import LayerDataIndex
+from .petrography import parsePetrography, CACHE_SIZE
+
+# maximum number of ids in a single "IN (...)" request
+MAX_IDS_PER_REQUEST = 1000
+
+# number of ids in the first request, which is small to show the first profiles fast
+FIRST_REQUEST_SIZE = 16
 
 class ProfileBuilder:
     """This class constructs the drilling profiles"""
 
-    def __init__(self, layerName, showMessage):
+    def __init__(self, layerName, showMessage, layerData=None):
         """Features are the 'Stammdaten', i.e. data regarding the drilling profiles.
-        config is the configuration element containing metadata to profiles."""
+        config is the configuration element containing metadata to profiles.
+        The Schichtdaten are read from the layer "<layerName>_data" unless
+        layerData is given, a dictionary mapping the key of each drilling
+        profile (see LayerDataIndex.key) to the list of its layers' attributes."""
         self.nameLayerSchichtdaten = "{}_data".format(layerName)
         self.showMessage = showMessage
-        self.petroPattern = re.compile(r"(\w*)\s*(\(.*\))?", re.IGNORECASE)
+        self._layerData = layerData
         self.config = Config(self.showErrorMessage)
+        self._connectorEngine = ConnectorEngine()
+        self.diagnostics = Diagnostics() # problems of the layers, see reportDiagnostics
+        # petrographies repeat heavily, so the derived data is computed only once
+        self._layerInfo = lru_cache(maxsize=CACHE_SIZE)(self._getLayerInfo)
+
+    def _getSchichtdaten(self, profileIds):
+        """Get the Schichtdaten corresponding to the given drilling profiles.
+        Cached layers are taken from the LayerDataIndex, the others are fetched
+        with as few requests as possible and grouped by the profile they belong to.
+        Return a dictionary mapping each profile id to a list of dictionaries
+        containing the layers' attributes or None if the layer containing the
+        Schichtdaten was not found."""
+        if self._layerData is not None:
+            return {profileId: self._layerData.get(LayerDataIndex.key(profileId), [])
+                for profileId in profileIds}
+
+        layer = self.getLayerSchichtdaten()
+        if layer is None:
+            return None
 
-    def _getSchichtdaten(self, profileId):
-        """Get the Schichtdaten corresponding to given drilling profile"""
-        qex = QgsExpression(QgsExpression().createFieldEqualityExpression(self.config.settings["dataId"], profileId))
-        qfr = QgsFeatureRequest(qex)
+        rows, missing = self.lookupSchichtdaten(layer, profileIds)
+        for fetched, featureIds in self.fetchSchichtdaten(layer, missing):
+            self.storeSchichtdaten(layer, fetched, featureIds)
+            rows.update(fetched)
+        return {profileId: rows[LayerDataIndex.key(profileId)] for profileId in profileIds}
+
+    def getLayerSchichtdaten(self):
+        """Return the layer containing the Schichtdaten or None if it was not found.
+        This has to be called on the main thread."""
         layerSchichtdaten = QgsProject().instance().mapLayersByName(self.nameLayerSchichtdaten)
 
         if len(layerSchichtdaten) == 0:
             self.showErrorMessage("Error", "Layer {} not found.".format(self.nameLayerSchichtdaten))
             return None
 
-        # we may want to sort the features by "schichtnr"
-        return layerSchichtdaten[0].getFeatures(qfr)
-
-    def _getLayerAttributes(self, schichtdaten):
-        """Get a list of dictionaries containing the layers' attributes"""
-        result = []
-        for sd in schichtdaten:
-            result.append({field.name(): attr for field, attr in zip(sd.fields(), sd.attributes())})
-        return result
-
-    def _splitPetrographie(self, petro):
-        """Split the given Petrograhie into Großgruppe and Kleingruppe"""
-        if not isinstance(petro, str):
-            return (None, [])
-        m = self.petroPattern.match(petro)
-        gg = m.group(1) # Großgruppe
-        kg = []
-        k = m.group(2) # Kleingruppe
-        if k is not None:
-            # chop off parantheses
-            k = k[1:-1]
-            # and make a list of it
-            kg = [s.strip() for s in k.split(",") if not (s.isspace() or (s == ''))]
-        return (gg, kg)
-
-    def getProfilesAndConnectors(self, features):
-        """Get the drilling profiles and its connectors"""
-        profiles = []
+        return layerSchichtdaten[0]
+
+    def lookupSchichtdaten(self, layer, profileIds):
+        """Look up the profiles' Schichtdaten in the LayerDataIndex. Return the
+        cached rows and the profiles to be fetched, both keyed by LayerDataIndex.key.
+        This has to be called on the main thread."""
+        index = LayerDataIndex.instance()
+        index.watch(layer, self.config.settings["dataId"])
+
+        rows = {}
+        missing = {}
+        for profileId in profileIds:
+            key = LayerDataIndex.key(profileId)
+            cached = index.lookup(layer.id(), key)
+            if cached is None:
+                missing[key] = profileId
+            else:
+                rows[key] = cached
+        return rows, missing
+
+    def fetchSchichtdaten(self, source, missing, feedback=None):
+        """Fetch the Schichtdaten of the missing profiles (see lookupSchichtdaten)
+        from the source, i.e. the layer or a QgsVectorLayerFeatureSource of it,
+        which may be used on any thread. The profiles are fetched in chunks in
+        the given order, the first chunk is small to get the first profiles fast.
+        Yield the rows of each chunk and the ids of the features they were read
+        from, both keyed by LayerDataIndex.key. Fetching stops if the optional
+        feedback (e.g. a QgsTask) is canceled."""
+        dataId = self.config.settings["dataId"]
+        ids = list(missing.values())
+        start = 0
+        size = FIRST_REQUEST_SIZE
+        while start < len(ids):
+            if (feedback is not None) and feedback.isCanceled():
+                return
+            chunk = ids[start:start + size]
+            fetched = {LayerDataIndex.key(i): [] for i in chunk}
+            featureIds = {key: [] for key in fetched}
+            qfr = QgsFeatureRequest(self._createInExpression(dataId, chunk))
+            for sd in source.getFeatures(qfr):
+                attributes = {field.name(): attr for field, attr in zip(sd.fields(), sd.attributes())}
+                key = LayerDataIndex.key(attributes[dataId])
+                if key in fetched:
+                    # we may want to sort the features by "schichtnr"
+                    fetched[key].append(attributes)
+                    featureIds[key].append(sd.id())
+            yield fetched, featureIds
+            start = start + size
+            size = MAX_IDS_PER_REQUEST
+
+    def storeSchichtdaten(self, layer, fetched, featureIds, generation=None):
+        """Cache the fetched Schichtdaten in the LayerDataIndex. If the data was
+        fetched in the background the generation of the layer's cache at the time
+        of the lookup prevents storing outdated data (see LayerDataIndex.store).
+        This has to be called on the main thread."""
+        index = LayerDataIndex.instance()
+        for key, attributes in fetched.items():
+            index.store(layer.id(), key, attributes, featureIds[key], generation)
+
+    def _createInExpression(self, fieldName, values):
+        """Create an expression matching all features whose field has one of the given values"""
+        return QgsExpression("{} IN ({})".format(QgsExpression.quotedColumnRef(fieldName),
+            ", ".join([QgsExpression.quotedValue(v) for v in values])))
+
+    def getProfilesAndConnectors(self, features, positions=None):
+        """Get the drilling profiles and its connectors (see arrangeProfiles)"""
+        return self.arrangeProfiles(features, self.buildProfiles(features), positions)
+
+    def buildProfiles(self, features):
+        """Build the drilling profiles of the given features. Return a list
+        containing each feature's profile or None if it could not be built.
+        The profiles are positioned by arrangeProfiles."""
+        if len(features) == 0:
+            return []
+
+        schichtdaten = self._getSchichtdaten(
+            [f.attribute(self.config.settings["boreholeId"]) for f in features])
+        profiles = [self._buildProfile(f, schichtdaten) for f in features]
+        self.reportDiagnostics()
+        return profiles
+
+    def reportDiagnostics(self):
+        """Report the problems found since the last report (see Diagnostics)"""
+        self.diagnostics.report(self.showMessage)
+
+    def iterProfiles(self, features, rows, chunks=(), feedback=None):
+        """Yield the profile of each feature (or None, see buildProfiles) as soon
+        as its Schichtdaten are available. The parameter rows contains the
+        Schichtdaten known in advance keyed by LayerDataIndex.key (None if the
+        layer was not found), chunks yields further rows (see fetchSchichtdaten).
+        The progress is reported to the optional feedback (e.g. a QgsTask) per
+        profile. The profiles stop if the feedback is canceled. The problems
+        found are collected, the caller reports them (see reportDiagnostics)."""
+        rows = dict(rows) if rows is not None else None
+        chunks = iter(chunks)
+        for i, f in enumerate(features):
+            if (feedback is not None) and feedback.isCanceled():
+                return
+            schichtdaten = None
+            if rows is not None:
+                profileId = f.attribute(self.config.settings["boreholeId"])
+                key = LayerDataIndex.key(profileId)
+                while key not in rows:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        return # fetching was canceled
+                    rows.update(chunk)
+                schichtdaten = {profileId: rows[key]}
+            yield self._buildProfile(f, schichtdaten)
+            if feedback is not None:
+                feedback.setProgress(100 * (i + 1) / len(features))
+
+    def _buildProfile(self, feature, schichtdaten):
+        """Build the feature's profile"""
+        # The y-position of the profile is the elevation (z-coordinate).
+        yp = feature.attribute(self.config.settings["zCoord"]) * 100 # convert to cm
+        return self._getProfile(feature.attribute(self.config.settings["boreholeId"]),
+            0.0, yp, schichtdaten)
+
+    def getPositions(self, features):
+        """Get the x-position of each feature's profile (in cm). The x-position
+        of a profile is the distance to the previous one, the first is at 0."""
+        positions = []
         if len(features) > 0:
             x = features[0].attribute(self.config.settings["xCoord"])
             y = features[0].attribute(self.config.settings["yCoord"])
             xp = 0
             for f in features:
-                # The x-position (xp) of the drilling profile is the distance
-                # to the previous coordinate. We start with xp = 0.
-                # The y-position of the profile is the elevation (z-coordinate).
                 distance = sqrt((f.attribute(self.config.settings["xCoord"]) - x)**2
                             + (f.attribute(self.config.settings["yCoord"]) - y)**2)
                 xp = xp + distance
-                yp = f.attribute(self.config.settings["zCoord"]) * 100 # convert to cm
-
-                profiles.append(self._getProfile(f.attribute(self.config.settings["boreholeId"]), xp * 100, yp))
+                positions.append(xp * 100) # convert to cm
 
                 x = f.attribute(self.config.settings["xCoord"])
                 y = f.attribute(self.config.settings["yCoord"])
-
+        return positions
+
+    def arrangeProfiles(self, features, profiles, positions=None):
+        """Position the profiles in the order of the given features and get
+        the profiles and their connectors and gauges. The parameter profiles
+        contains the features' profiles as returned by buildProfiles. Since only
+        the positions depend on the order the same profiles may be arranged
+        again, e.g. if the direction of the drawing is changed. The x-positions
+        (in cm) may be given explicitly, e.g. the chainages along a Transect,
+        by default they are determined by getPositions."""
+        return list(self.iterArrangement(features, profiles, positions))
+
+    def iterArrangement(self, features, profiles, positions=None):
+        """Like arrangeProfiles, but yield the objects to be painted as soon as
+        they are known: each profile followed by the connectors to its left
+        neighbour, finally the gauges. The parameter profiles may be a generator
+        (see iterProfiles), i.e. the profiles are arranged while they are built."""
+        if positions is None:
+            positions = self.getPositions(features)
         actualProfiles = []
-        actualFeatures = []
-        for p, f in zip(profiles, features):
-            if p is not None:
-                actualProfiles.append(p)
-                actualFeatures.append(f)
+        for p, x in zip(profiles, positions):
+            if p is None:
+                continue
+            p.x = x
+            yield p
+            if len(actualProfiles) > 0:
+                yield from self._connectorEngine.connectTwoProfiles(actualProfiles[-1], p)
+            actualProfiles.append(p)
+
         if len(actualProfiles) == 0:
             self.showMessage("Info", "Select at least one feature or activate the correct layer.", Qgis.Info)
 
-        connectors = self._connectProfiles(actualProfiles, actualFeatures)
-        gauges = self._getGauges(actualProfiles)
+        yield from self._getGauges(actualProfiles)
 
-        return actualProfiles + connectors + gauges
-
-    def _getProfile(self, profileId, x, y):
-        """Construct a profile from feature"""
-        schichtdaten = self._getSchichtdaten(profileId)
+    def _getProfile(self, profileId, x, y, schichtdaten):
+        """Construct a profile from feature. The parameter schichtdaten
+        contains the layers' attributes of all profiles (see _getSchichtdaten)."""
         if schichtdaten is None:
             return None
 
@@ -124,11 +269,7 @@ class ProfileBuilder:
         profile.x = x
         profile.y = y
 
-        boxes = self.config.geoCore['boxes']
-        colors = self.config.geoCore['colors']
-        descriptions = self.config.geoCore['descriptions']
-        facies = self.config.geoCore['facies']
-        layerAttributes = self._getLayerAttributes(schichtdaten)
+        layerAttributes = schichtdaten.get(profileId, [])
         for l in layerAttributes:
             pb = ProfileBox(l[self.config.settings["layerNo"]])
             pb.group = l[self.config.settings["group"]]
@@ -137,139 +278,68 @@ class ProfileBuilder:
             pb.height = l[self.config.settings["depthTo"]]-l[self.config.settings["depthFrom"]]
             pb.depth = l[self.config.settings["depthTo"]]
 
-            gg, kg = self._splitPetrographie(l[self.config.settings["petrography"]])
-            pb.name = gg
-            try:
-                pb.width = boxes[gg]['width']
-            except KeyError:
-                pb.width = 0.1
-                self.showMessage("Warning", "Missing main group in petrography: {}"
-                    .format(l[self.config.settings["petrography"]]), Qgis.Warning)
-
-            color = self._cfgLookup(colors, l[self.config.settings["color"]])
-            pb.color = self._cfgLookup(color, 'code')
-            pb.texture = self._cfgLookup(color, 'texture', showError=False)
-
-            ggDict = self._cfgLookup(boxes, gg)
-            infoList = []
-            infoList.append(self._cfgLookup(facies, l[self.config.settings["facies"]],
-                errorValue=l[self.config.settings["facies"]]))
-            infoList.append(self._cfgLookup(ggDict, 'longname', errorValue=gg))
-            for k in kg:
-                kgDict = self._cfgLookup(descriptions, k)
-                infoList.append(self._cfgLookup(kgDict, 'longname', errorValue=k))
-            infoList.append(l[self.config.settings["comment"]])
-            infoList.append(self._cfgLookup(color, 'longname'))
-            pb.info = ", ".join([i for i in infoList if (i is not None) and not isinstance(i, QVariant)])
-
-            profile.boxes.append(pb)
-
-            # QgsMessageLog.logMessage("Profile {} - petro: {}({}), width: {}, height: {}, x: {}, y: {}, info: {}"
-            #     .format(profileId, gg, kg, pb.width, pb.height, x, y, pb.info), level=Qgis.Info)
+            pb.name, pb.width, color, pb.info, issues = self._layerInfo(
+                self._value(l[self.config.settings["petrography"]]),
+                self._value(l[self.config.settings["facies"]]),
+                self._value(l[self.config.settings["color"]]),
+                self._value(l[self.config.settings["comment"]]))
+            for kind, key in issues:
+                self.diagnostics.add(kind, key, profileId)
+            if color is not None:
+                pb.color = color.code
+                pb.texture = color.texture
+
+            profile.addBox(pb)
+
+            # QgsMessageLog.logMessage("Profile {} - petro: {}, width: {}, height: {}, x: {}, y: {}, info: {}"
+            #     .format(profileId, pb.name, pb.width, pb.height, x, y, pb.info), level=Qgis.Info)
             y = y - pb.height
 
         return profile
 
-    def _cfgLookup(self, dictionary, key, showError=True, errorValue=None):
-        """Return key from dictionary. Return None if key not found."""
+    def _getLayerInfo(self, petrography, facies, color, comment):
+        """Return the name and width of the layer's box, its color entry, the
+        info string describing the layer and the problems found as tuple of
+        (kind, key) (see Diagnostics). The result only depends on the
+        parameters, hence it is cached by the caller (see _layerInfo)."""
+        tables = self.config.tables
+        issues = []
+        gg, kg = parsePetrography(petrography)
         try:
-            if (dictionary is not None) and not isinstance(key, QVariant):
-                return dictionary[key]
+            width = tables.boxWidths[gg]
         except KeyError:
-            if showError:
-                self.showMessage("Info", "Key {} not found in config.".format(key), Qgis.Info)
-        return errorValue
+            width = 0.1
+            issues.append((Diagnostics.MISSING_MAIN_GROUP, petrography))
 
-    def _connectProfiles(self, profiles, features):
-        """Multiple profiles need to be connected in the drawing"""
-        if len(profiles) <= 1:
-            return []
+        colorEntry = self._cfgLookup(tables.colors, color, issues)
 
-        connectors = []
-
-        i = 1 # we start with the second profile connecting it with the first
-        minLen = min(len(profiles), len(features))
-        while i < minLen:
-            cs = self._connectTwoProfiles(profiles[i - 1], profiles[i])
-            for c in cs:
-                connectors.append(c)
-            i = i + 1
-
-        return connectors
-
-    def _connectTwoProfiles(self, pLeft, pRight):
-        """Get connectors for left and right profile"""
-        connectors = []
-
-        # last group on the left and right
-        lgLeft = None
-
-        # y-coordinates
-        yLeft = pLeft.y
-        yRight = pRight.y
-
-        l = 0
-        r = 0
-        while l < len(pLeft.boxes):
-            if lgLeft != pLeft.boxes[l].group:
-                # new connector
-                c = Connector()
-                c.x1 = pLeft.x
-                c.y1 = yLeft
-                c.xOffset = pLeft.boxes[l].width
-
-                # find the corresponding group on the right side
-                found = False
-                while (r < len(pRight.boxes)) and not found:
-                    if pLeft.boxes[l].group == pRight.boxes[r].group:
-                        c.x2 = pRight.x
-                        c.y2 = yRight
-                        found = True
-                        connectors.append(c)
-                    yRight = yRight - pRight.boxes[r].height
-                    r = r + 1
-
-            lgLeft = pLeft.boxes[l].group
-            yLeft = yLeft - pLeft.boxes[l].height
-
-            if len(pLeft.boxes) != len(pRight.boxes) and r == len(pRight.boxes):
-                # last profile box on the right but not on the left
-                c = Connector()
-                c.x2 = pRight.x
-                c.y2 = pRight.y - pRight.height()
-
-                found = False
-                ll = len(pLeft.boxes) - 1
-                while ll >= l and not found:
-                    if pLeft.boxes[ll].group == pRight.boxes[r - 1].group:
-                        c.x1 = pLeft.x
-                        c.y1 = pLeft.y - sum([b.height for b in pLeft.boxes[:ll+1]])
-                        c.xOffset = pLeft.boxes[ll].width
-                        found = True
-                        connectors.append(c)
-                    ll = ll - 1
-
-            if l == len(pLeft.boxes) - 1:
-                # last profile box on the left
-                c = Connector()
-                c.x1 = pLeft.x
-                c.y1 = pLeft.y - pLeft.height()
-                c.xOffset = pLeft.boxes[l].width
-
-                # connect to last corresponding group on the right
-                found = False
-                rr = len(pRight.boxes) - 1
-                while (rr >= r - 1) and not found:
-                    if pLeft.boxes[l].group == pRight.boxes[rr].group:
-                        c.x2 = pRight.x
-                        c.y2 = pRight.y - sum([b.height for b in pRight.boxes[:rr+1]])
-                        found = True
-                        connectors.append(c)
-                    rr = rr - 1
-
-            l = l + 1
-
-        return connectors
+        infoList = []
+        infoList.append(self._cfgLookup(tables.facies, facies, issues, facies))
+        infoList.append(self._cfgLookup(tables.boxNames, gg, issues, gg))
+        for k in kg:
+            infoList.append(self._cfgLookup(tables.descriptions, k, issues, k))
+        infoList.append(comment)
+        infoList.append(colorEntry.longname if colorEntry is not None else None)
+        info = ", ".join([i for i in infoList if i is not None])
+
+        return gg, width, colorEntry, info, tuple(issues)
+
+    def _value(self, attribute):
+        """Return the attribute's value or None if it is NULL"""
+        if isinstance(attribute, QVariant):
+            return None
+        return attribute
+
+    def _cfgLookup(self, dictionary, key, issues=None, errorValue=None):
+        """Return key from dictionary. Return errorValue if key not found,
+        which is appended to the list of issues if given."""
+        try:
+            if (dictionary is not None) and (key is not None) and not isinstance(key, QVariant):
+                return dictionary[key]
+        except KeyError:
+            if issues is not None:
+                issues.append((Diagnostics.UNKNOWN_KEY, key))
+        return errorValue
 
     def _getGauges(self, profiles):
         """Gets the gauges for the left and bottom side"""
@@ -293,8 +363,8 @@ class ProfileBuilder:
         for p in profiles:
             minx = min(minx, p.x)
             maxx = max(maxx, p.x)
-            miny = min(miny, p.y, p.y - p.height())
-            maxy = max(maxy, p.y, p.y - p.height())
+            miny = min(miny, p.y, p.bottom())
+            maxy = max(maxy, p.y, p.bottom())
         return minx, maxx, miny, maxy
 
     def showErrorMessage(self, title, message):
@@ -19,7 +19,17 @@
     along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+from itertools import chain
+
+import numpy as np
+from qgis.PyQt.QtGui import QFontMetricsF
+
+from .boxAggregator import BoxAggregator
+from .levelOfDetail import LevelOfDetail
+from .pathBatches import PathBatches
 from .profile import Profile
+from .sceneItems import SceneItems
+from .svgWriter import SvgWriter
 
 class ProfilePainter:
     """This class is used to construct the graphics items"""
@@ -34,6 +44,13 @@ class ProfilePainter:
         self._yFac = 1.0
         self._doAutoScaleX = True
         self._doAutoScaleY = True
+        self._otbps = []
+        self._streamed = None # objects added since begin()
+        self._addDescription = False
+        self._batches = PathBatches(scene)
+        self._detail = LevelOfDetail.FULL
+        self._textHeight = QFontMetricsF(scene.font()).height()
+        self._aggregator = BoxAggregator()
 
     def applyScale(self, xFac, yFac):
         """Apply scaling factors in x- and y-dimension
@@ -53,61 +70,213 @@ class ProfilePainter:
             self._yFac = yFac
             self._doAutoScaleY = False
 
+    def setViewSize(self, viewWidth, viewHeight):
+        """Set the size of the view used for auto-scaling"""
+        self._viewWidth = viewWidth
+        self._viewHeight = viewHeight
+
+    def setMinBoxHeight(self, height):
+        """Merge consecutive boxes drawn lower than the given height (in scene
+        units) when the profiles are painted next (see BoxAggregator)"""
+        self._aggregator.minHeight = height
+
+    def setViewScale(self, scale):
+        """Adapt the level of detail of the painted objects to the view's
+        scale. The items are only changed if the level of detail changes."""
+        self.setDetail(LevelOfDetail.forScale(scale, self._textHeight))
+
+    def setDetail(self, detail):
+        """Set the level of detail of the painted objects"""
+        if detail == self._detail:
+            return
+        self._detail = detail
+        self._batches.setDetail(detail)
+        for o in self._otbps + (self._streamed or []):
+            self._sceneItems(o).setDetail(detail)
+
     def paint(self, otbps, addDescription):
         """Construct items.
         The parameter otbps stands for "objects to be painted"
         (i.e. profiles and connectors). Parameter addDescription
-        denotes if a description shall be added."""
+        denotes if a description shall be added.
+        Objects which have been painted before only update their items,
+        the items of objects painted before but not anymore are removed."""
+        self._removeStale(otbps)
+        self._otbps = otbps
+        self._addDescription = addDescription
+        self._applyAutoScale(otbps)
+        for i in otbps:
+            self._paintOtbp(i)
+        self._batches.flush()
+
+    def begin(self, addDescription, xPositions=None):
+        """Begin painting objects one by one while they are built (see add and
+        end). They are painted with the scaling factors known in advance:
+        auto-scaling uses the given x-positions of the profiles for the
+        x-dimension and the first profile for the y-dimension."""
+        self._streamed = []
+        self._addDescription = addDescription
+        if self._doAutoScaleX and (xPositions is not None):
+            self._setAutoXFac(xPositions)
+
+    def add(self, otbp):
+        """Paint a single object (see begin)"""
+        if self._doAutoScaleY and isinstance(otbp, Profile) and \
+                not any(isinstance(o, Profile) for o in self._streamed):
+            self._setAutoYFac([otbp])
+        self._streamed.append(otbp)
+        self._paintOtbp(otbp)
+        self._batches.flush()
+
+    def end(self, addDescription):
+        """Finish painting the objects added since begin(). They replace the
+        objects painted before. If the final scaling factors or the description
+        differ from those used while adding, the objects are painted again,
+        i.e. their items are moved and resized."""
+        otbps = self._streamed
+        self._streamed = None
+        factors = (self._xFac, self._yFac, self._addDescription)
+        self._applyAutoScale(otbps)
+        if factors != (self._xFac, self._yFac, addDescription):
+            self.paint(otbps, addDescription)
+        else:
+            self._removeStale(otbps)
+            self._otbps = otbps
+            self._batches.flush()
+
+    def writeSvg(self, fileName, otbps=None, addDescription=None):
+        """Write the objects straight to an SVG file (see SvgWriter) without
+        adding items to the scene. By default the objects painted last are
+        written as they are painted, other objects are auto-scaled like paint()
+        does. The file is only created if all objects could be written."""
+        if otbps is None:
+            otbps = self._otbps
+        else:
+            self._applyAutoScale(otbps)
+        if addDescription is None:
+            addDescription = self._addDescription
+
+        writer = SvgWriter(fileName, self.scene.font())
+        try:
+            for o in otbps:
+                self._prepare(o)
+                items = writer.items()
+                o.paint(items)
+                if addDescription:
+                    o.paintDescription(items)
+                items.commit()
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+
+    def _applyAutoScale(self, otbps):
+        """Set the auto-scaled factors for the given objects"""
         if self._doAutoScaleX:
-            self._setAutoXFac(otbps)
+            self._setAutoXFac(self._xPositions(otbps))
         if self._doAutoScaleY:
             self._setAutoYFac(otbps)
-        for i in otbps:
-            i.setXFac(self._xFac)
-            i.setYFac(self._yFac)
-            i.paint(self.scene)
-            if addDescription:
-                i.paintDescription(self.scene)
 
-    def _setAutoXFac(self, otbps):
-        """Set smart scaling factor for the x-dimension"""
-        xPositions = [ p.x for p in otbps if isinstance(p, Profile) ]
+    def _prepare(self, otbp):
+        """Apply the current scaling factors to an object"""
+        if isinstance(otbp, Profile):
+            self._aggregator.apply(otbp, self._yFac)
+        otbp.setXFac(self._xFac)
+        otbp.setYFac(self._yFac)
+
+    def _paintOtbp(self, otbp):
+        """Paint an object with the current scaling factors"""
+        self._prepare(otbp)
+        items = self._sceneItems(otbp)
+        items.setDetail(self._detail)
+        items.begin()
+        otbp.paint(items)
+        if self._addDescription:
+            otbp.paintDescription(items)
+        items.commit()
+
+    def _sceneItems(self, otbp):
+        """Return the graphics items the object has added to the scene.
+        Rectangles and lines are merged into the painter's PathBatches."""
+        items = otbp.items
+        if (items is None) or (items.scene is not self.scene) or (items.batches is not self._batches):
+            items = SceneItems(self.scene, self._batches, otbp.batchGroup())
+            otbp.items = items
+        return items
 
+    def _removeStale(self, otbps):
+        """Remove the items of the objects painted before but not anymore"""
+        for o in set(self._otbps).difference(otbps):
+            self._sceneItems(o).remove()
+            self._aggregator.forget(o)
+
+    def rescale(self, xFac, yFac):
+        """Apply new scaling factors (see applyScale) to the objects painted
+        last. Their items are moved and resized instead of being rebuilt."""
+        self.applyScale(xFac, yFac)
+        self.paint(self._otbps, self._addDescription)
+
+    def _xPositions(self, otbps):
+        """Get the x-positions of the profiles"""
+        return [ p.x for p in otbps if isinstance(p, Profile) ]
+
+    def _setAutoXFac(self, xPositions):
+        """Set smart scaling factor for the x-dimension, i.e. the
+        closest neighbouring profiles are a view's width apart"""
         if len(xPositions) <= 1:
             return
 
-        diffs = list(map(lambda x, y: x - y, xPositions[1:], xPositions))
+        diffs = np.diff(np.asarray(xPositions, dtype=float))
+        diffs = diffs[diffs > 0] # profiles at the same position are skipped
+        if len(diffs) == 0:
+            return
 
         margin = 10
         vw = (self._viewWidth - margin) / 28.35 # pixel to cm
 
-        self._xFac = vw / min(diffs)
+        self._xFac = vw / diffs.min()
 
     def _setAutoYFac(self, otbps):
-        """Set a smart scaling factor for the y-dimension"""
-        facs = [ self._determineYFac(o) for o in otbps ]
-        facsShrink = [ s for s in facs if s < 1.0 ]
-        facsStretch = [ s for s in facs if s >= 1.0 ]
+        """Set a smart scaling factor for the y-dimension. If some objects
+        have to shrink and others to stretch the factor is 1.0, otherwise it
+        is the factor closest to 1.0 (see _determineYFacs)."""
+        parts = [ o.partsHeights() for o in otbps ]
+        counts = [ len(p) for p in parts ]
+        heights = np.fromiter(chain.from_iterable(parts), dtype=float, count=sum(counts))
+        owners = np.repeat(np.arange(len(parts)), counts)
+
+        facs = self._determineYFacs(heights, owners, len(parts))
+        facsShrink = facs[facs < 1.0]
+        facsStretch = facs[facs >= 1.0]
 
         self._yFac = 1.0
 
         if (len(facsShrink) > 0) and (len(facsStretch) > 0):
             self._yFac = 1.0
         elif len(facsShrink) > 0:
-            self._yFac = max(facsShrink)
+            self._yFac = float(facsShrink.max())
         elif len(facsStretch) > 0:
-            self._yFac = min(facsStretch)
+            self._yFac = float(facsStretch.min())
 
-    def _determineYFac(self, otbp):
-        """Determine a smart scaling factor for the y-dimension"""
+    def _determineYFacs(self, heights, owners, count):
+        """Determine a smart scaling factor for the y-dimension of each of the
+        count objects. The parts' heights are given as a flat array, owners
+        contains the index of the object each part belongs to. An object's
+        highest part which does not fit into the view is shrunk to the view's
+        height. If all parts fit the highest one is stretched. Objects
+        without (non-zero) parts are not scaled."""
         margin = 10
         vh = (self._viewHeight - margin) / 28.35 # pixel to cm
-        facsShrink = [ vh / h for h in otbp.partsHeights() if h > vh and h != 0 ]
-        facsStretch = [ vh / h for h in otbp.partsHeights() if h <= vh and h != 0 ]
 
-        if len(facsShrink) > 0:
-            return max(facsShrink)
-        if len(facsStretch) > 0:
-            return min(facsStretch)
+        valid = (heights != 0) & ~np.isnan(heights)
+        heights = heights[valid]
+        owners = owners[valid]
+        facs = vh / heights
+        tooHigh = heights > vh
+
+        shrink = np.full(count, -np.inf)
+        np.maximum.at(shrink, owners[tooHigh], facs[tooHigh])
+        stretch = np.full(count, np.inf)
+        np.minimum.at(stretch, owners[~tooHigh], facs[~tooHigh])
 
-        return 1.0
+        return np.where(shrink > -np.inf, shrink, np.where(stretch < np.inf, stretch, 1.0))
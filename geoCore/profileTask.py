@@ -0,0 +1,120 @@
+""" This module contains the class ProfileTask
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.core import Qgis, QgsTask, QgsVectorLayerFeatureSource
+from qgis.PyQt.QtCore import pyqtSignal
+
+from .instrumentation import StageTimer
+from .layerDataIndex import LayerDataIndex
+from .profileBuilder import ProfileBuilder
+
+class ProfileTask(QgsTask):
+    """This task fetches the Schichtdaten and builds the drilling profiles in
+    the background. Each object to be painted (profiles, connectors and gauges)
+    is emitted as soon as it is known, so it can be painted right away.
+    Messages are collected and shown when the task has finished, since the
+    message bar must only be used on the main thread."""
+
+    # emitted for every object to be painted (queued to the main thread)
+    otbpBuilt = pyqtSignal(object)
+
+    def __init__(self, layerName, features, showMessage, onFinished, timer=None, positions=None):
+        """Prepare the task on the main thread. The parameter onFinished is
+        called with the features' profiles (see ProfileBuilder.buildProfiles)
+        on the main thread unless the task was canceled or failed. The stages
+        query, profiles and connectors are measured by the optional StageTimer.
+        The profiles' x-positions may be given (see ProfileBuilder.arrangeProfiles)."""
+        super().__init__("Building drilling profiles", QgsTask.CanCancel)
+        self.features = features
+        self.otbps = [] # the objects emitted so far
+        self._showMessage = showMessage
+        self._onFinished = onFinished
+        self._messages = []
+        self._exception = None
+        self._profiles = []
+        self._fetched = {}
+        self._featureIds = {}
+
+        self._builder = ProfileBuilder(layerName, self._queueMessage)
+        self._timer = timer if timer is not None else StageTimer("build", {})
+        self.positions = positions if positions is not None else self._builder.getPositions(features)
+        self._layer = self._builder.getLayerSchichtdaten()
+        if self._layer is not None:
+            profileIds = [f.attribute(self._builder.config.settings["boreholeId"]) for f in features]
+            with self._timer.stage("query"):
+                self._rows, self._missing = self._builder.lookupSchichtdaten(self._layer, profileIds)
+            self._timer.count("query", cached=len(self._rows))
+            self._generation = LayerDataIndex.instance().generation(self._layer.id())
+            self._source = QgsVectorLayerFeatureSource(self._layer)
+
+    def run(self):
+        """Fetch the Schichtdaten and build the profiles, their connectors and gauges"""
+        try:
+            rows = None
+            chunks = ()
+            if self._layer is not None:
+                rows = self._rows
+                chunks = self._timer.iterate("query", self._fetch(), "chunks")
+            profiles = self._record(self._timer.iterate("profiles",
+                self._builder.iterProfiles(self.features, rows, chunks, self), "profiles"))
+            arrangement = self._builder.iterArrangement(self.features, profiles, self.positions)
+            for o in self._timer.iterate("connectors", arrangement, "objects"):
+                self.otbps.append(o)
+                self.otbpBuilt.emit(o)
+            return not self.isCanceled()
+        except Exception as e: # pylint: disable=broad-except
+            # exceptions must not leave the task's thread
+            self._exception = e
+            return False
+
+    def _fetch(self):
+        """Fetch the missing Schichtdaten chunk by chunk
+        and keep them for the LayerDataIndex"""
+        for fetched, featureIds in self._builder.fetchSchichtdaten(self._source, self._missing, self):
+            self._fetched.update(fetched)
+            self._featureIds.update(featureIds)
+            self._timer.count("query", fetched=len(fetched), layers=sum(len(v) for v in fetched.values()))
+            yield fetched
+
+    def _record(self, profiles):
+        """Keep the profiles for onFinished"""
+        for p in profiles:
+            self._profiles.append(p)
+            yield p
+
+    def finished(self, result):
+        """Cache the fetched data, show the collected messages and hand the
+        profiles over (main thread)"""
+        if self._layer is not None:
+            self._builder.storeSchichtdaten(self._layer, self._fetched, self._featureIds, self._generation)
+        if not self.isCanceled():
+            for title, message, level in self._messages:
+                self._showMessage(title, message, level)
+            self._builder.diagnostics.report(self._showMessage)
+        if self._exception is not None:
+            self._showMessage("Error", "Failed to build the drilling profiles: {}".format(self._exception),
+                Qgis.Critical)
+        if result:
+            self._onFinished(self._profiles)
+
+    def _queueMessage(self, title, message, level):
+        """Collect a message to be shown when the task has finished"""
+        self._messages.append((title, message, level))
@@ -0,0 +1,193 @@
+""" This module contains the classes PngWriter and TiffWriter
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import struct
+import zlib
+
+# bytes per RGBA pixel
+PIXEL_SIZE = 4
+
+def _discard(file):
+    """Close and delete an incomplete file"""
+    file.close()
+    if os.path.exists(file.name):
+        os.remove(file.name)
+
+class PngWriter:
+    """This class writes a RGBA image to a PNG file row by row,
+    so the whole image never has to be kept in memory"""
+
+    def __init__(self, fileName, width, height):
+        """Open the file and write the image header"""
+        self.width = width
+        self.height = height
+        self._rows = 0
+        self._compressor = zlib.compressobj(6)
+        self._file = open(fileName, "wb")
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        # 8 bits per sample, colour type 6 (RGBA), deflate, no interlace
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+
+    def write(self, data):
+        """Append whole rows of RGBA pixels (without padding)"""
+        rowSize = self.width * PIXEL_SIZE
+        rows = len(data) // rowSize
+        # every row is preceded by its filter type (0: none)
+        raw = b"".join([b"\x00" + data[i * rowSize:(i + 1) * rowSize] for i in range(rows)])
+        self._rows = self._rows + rows
+        compressed = self._compressor.compress(raw)
+        if len(compressed) > 0:
+            self._chunk(b"IDAT", compressed)
+
+    def close(self):
+        """Finish and close the file"""
+        try:
+            if self._rows != self.height:
+                raise IOError("{} rows written, {} expected".format(self._rows, self.height))
+            self._chunk(b"IDAT", self._compressor.flush())
+            self._chunk(b"IEND", b"")
+        except Exception:
+            self.abort()
+            raise
+        self._file.close()
+
+    def abort(self):
+        """Close and delete the incomplete file"""
+        _discard(self._file)
+
+    def _chunk(self, kind, data):
+        """Write a chunk"""
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+class TiffWriter:
+    """This class writes a RGBA image to a deflate compressed TIFF file
+    strip by strip, so the whole image never has to be kept in memory"""
+
+    # field types
+    SHORT = 3
+    LONG = 4
+    RATIONAL = 5
+
+    # size of the strips (uncompressed)
+    STRIP_SIZE = 64 * 1024
+
+    def __init__(self, fileName, width, height):
+        """Open the file and write the image header"""
+        self.width = width
+        self.height = height
+        self.rowsPerStrip = max(1, min(height, self.STRIP_SIZE // (width * PIXEL_SIZE)))
+        self._pending = b""
+        self._rows = 0
+        self._offsets = []
+        self._byteCounts = []
+        self._file = open(fileName, "wb")
+        # little endian, the offset of the IFD is written by close()
+        self._file.write(b"II*\x00\x00\x00\x00\x00")
+
+    def write(self, data):
+        """Append whole rows of RGBA pixels (without padding)"""
+        self._pending = self._pending + data
+        self._rows = self._rows + len(data) // (self.width * PIXEL_SIZE)
+        stripSize = self.rowsPerStrip * self.width * PIXEL_SIZE
+        start = 0
+        while len(self._pending) - start >= stripSize:
+            self._strip(self._pending[start:start + stripSize])
+            start = start + stripSize
+        self._pending = self._pending[start:]
+
+    def close(self):
+        """Write the remaining strip and the image file directory (IFD), close the file"""
+        try:
+            if self._rows != self.height:
+                raise IOError("{} rows written, {} expected".format(self._rows, self.height))
+            if len(self._pending) > 0:
+                self._strip(self._pending)
+            self._writeIfd()
+        except Exception:
+            self.abort()
+            raise
+        self._file.close()
+
+    def abort(self):
+        """Close and delete the incomplete file"""
+        _discard(self._file)
+
+    def _strip(self, data):
+        """Write a strip"""
+        self._offsets.append(self._file.tell())
+        compressed = zlib.compress(data, 6)
+        self._byteCounts.append(len(compressed))
+        self._file.write(compressed)
+
+    def _writeIfd(self):
+        """Write the values not fitting into the IFD's entries, then the IFD"""
+        entries = [
+            (256, self.LONG, [self.width]), # ImageWidth
+            (257, self.LONG, [self.height]), # ImageLength
+            (258, self.SHORT, [8, 8, 8, 8]), # BitsPerSample
+            (259, self.SHORT, [8]), # Compression: deflate
+            (262, self.SHORT, [2]), # PhotometricInterpretation: RGB
+            (273, self.LONG, self._offsets), # StripOffsets
+            (277, self.SHORT, [PIXEL_SIZE]), # SamplesPerPixel
+            (278, self.LONG, [self.rowsPerStrip]), # RowsPerStrip
+            (279, self.LONG, self._byteCounts), # StripByteCounts
+            (282, self.RATIONAL, [(72, 1)]), # XResolution
+            (283, self.RATIONAL, [(72, 1)]), # YResolution
+            (284, self.SHORT, [1]), # PlanarConfiguration: chunky
+            (296, self.SHORT, [2]), # ResolutionUnit: inch
+            (338, self.SHORT, [2]), # ExtraSamples: unassociated alpha
+        ]
+
+        ifd = []
+        for tag, kind, values in entries:
+            data = self._pack(kind, values)
+            if len(data) <= 4:
+                ifd.append(struct.pack("<HHI", tag, kind, len(values)) + data.ljust(4, b"\x00"))
+            else:
+                self._align()
+                offset = self._file.tell()
+                self._file.write(data)
+                ifd.append(struct.pack("<HHII", tag, kind, len(values), offset))
+
+        self._align()
+        ifdOffset = self._file.tell()
+        if ifdOffset > 0xFFFFFFFF:
+            raise IOError("The image exceeds the maximum size of a TIFF file")
+        self._file.write(struct.pack("<H", len(ifd)) + b"".join(ifd) + struct.pack("<I", 0))
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", ifdOffset))
+
+    def _pack(self, kind, values):
+        """Pack the values of the given field type"""
+        if kind == self.SHORT:
+            return struct.pack("<{}H".format(len(values)), *values)
+        if kind == self.LONG:
+            return struct.pack("<{}I".format(len(values)), *values)
+        return b"".join([struct.pack("<II", n, d) for n, d in values])
+
+    def _align(self):
+        """Move to the next word boundary"""
+        if self._file.tell() % 2 != 0:
+            self._file.write(b"\x00")
@@ -0,0 +1,238 @@
+""" Command-line renderer for drilling profiles
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+
+ Renders a section of drilling profiles to a SVG or image file without
+ a running QGIS GUI, e.g.
+
+    python -m geoCore.render example_data/corings.csv \\
+        --layers example_data/corings_data.csv -o section.svg
+
+ The drilling profiles and their layers are read from CSV files or from
+ tables of a GeoPackage. The columns are mapped by config/config.yml just
+ like in the plugin. Unless QT_QPA_PLATFORM is set the offscreen platform
+ is used, so no display is required.
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+from qgis.core import Qgis
+from qgis.PyQt.QtWidgets import QApplication, QGraphicsScene
+
+from .geoCoreConfig import Config
+from .layerDataIndex import LayerDataIndex
+from .profileBuilder import ProfileBuilder
+from .profilePainter import ProfilePainter
+from .sceneExporter import SceneExporter
+
+# sort criteria of the drawing directions, see PetroProfileDialog
+DIRECTIONS = {
+    "ns": lambda settings: lambda f: -f.attribute(settings["yCoord"]), # north -> south
+    "sn": lambda settings: lambda f: f.attribute(settings["yCoord"]), # south -> north
+    "we": lambda settings: lambda f: f.attribute(settings["xCoord"]), # west -> east
+    "ew": lambda settings: lambda f: -f.attribute(settings["xCoord"]), # east -> west
+}
+
+class TableFeature:
+    """A row of a table. It provides the part of QgsFeature's interface
+    used by ProfileBuilder."""
+
+    def __init__(self, fid, attributes):
+        """Initialize the feature with its id and a dictionary of attributes"""
+        self._id = fid
+        self.attributes = attributes
+
+    def id(self):
+        """Return the feature's id"""
+        return self._id
+
+    def attribute(self, name):
+        """Return the value of the given attribute"""
+        return self.attributes[name]
+
+def readTable(fileName, table=None, delimiter=";"):
+    """Read the rows of a CSV file or of a table of a GeoPackage.
+    Return a list of TableFeatures."""
+    if Path(fileName).suffix.upper() == ".GPKG":
+        if table is None:
+            raise ValueError("A table is required to read {}".format(fileName))
+        return _readGeoPackage(fileName, table)
+    return _readCsv(fileName, delimiter)
+
+def _readCsv(fileName, delimiter):
+    """Read the rows of a CSV file. Numbers are converted,
+    empty values are None."""
+    with open(fileName, newline='', encoding='utf-8-sig') as f:
+        return [TableFeature(i, {k: _convert(v) for k, v in row.items()})
+            for i, row in enumerate(csv.DictReader(f, delimiter=delimiter))]
+
+def _convert(value):
+    """Convert a CSV value to int, float or None if possible"""
+    if (value is None) or (value.strip() == ''):
+        return None
+    for t in (int, float):
+        try:
+            return t(value)
+        except ValueError:
+            pass
+    return value
+
+def _readGeoPackage(fileName, table):
+    """Read the rows of a table of a GeoPackage"""
+    with sqlite3.connect(fileName) as connection:
+        cursor = connection.execute('SELECT * FROM "{}"'.format(table.replace('"', '""')))
+        names = [d[0] for d in cursor.description]
+        return [TableFeature(i, dict(zip(names, row))) for i, row in enumerate(cursor)]
+
+def groupLayerData(rows, dataId):
+    """Group the layers' attributes by drilling profile
+    as required by ProfileBuilder's parameter layerData"""
+    layerData = {}
+    for row in rows:
+        layerData.setdefault(LayerDataIndex.key(row.attribute(dataId)), []).append(row.attributes)
+    return layerData
+
+def printMessage(title, message, level=Qgis.Info):
+    """Print a message to stderr"""
+    if level != Qgis.Info:
+        print("{}: {}".format(title, message), file=sys.stderr)
+
+def ensureApplication():
+    """Return the Qt application, which is created if necessary.
+    Without a display Qt's offscreen platform is used."""
+    app = QApplication.instance()
+    if app is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = QApplication([sys.argv[0]])
+    return app
+
+class SectionRenderer:
+    """This class renders sections of drilling profiles to files.
+    The data is loaded once and may be used for any number of sections."""
+
+    def __init__(self, boreholes, layerData, showMessage=printMessage, viewSize=(1200, 800)):
+        """The parameter boreholes is a list of features of the drilling profiles,
+        layerData contains their layers as returned by groupLayerData. The view
+        size (in pixels) is used for auto-scaling just like the dialog's view."""
+        self.boreholes = boreholes
+        self.layerData = layerData
+        self.showMessage = showMessage
+        self.viewSize = viewSize
+        self.settings = Config(self._showErrorMessage).settings
+
+    def render(self, output, ids=None, direction="ns", xFac=None, yFac=None, addDescription=None):
+        """Render the section of the given drilling profiles (all if ids is None)
+        in the given direction to the output file. Scaling factors of None denote
+        auto-scaling. A description is added to single profiles unless
+        addDescription is given. Return the number of painted objects.
+        Raises ValueError if none of the given ids matches a drilling profile
+        (see unmatchedIds)."""
+        features = self.boreholes
+        if ids is not None:
+            keys = {LayerDataIndex.key(i) for i in ids}
+            features = [f for f in features
+                if LayerDataIndex.key(f.attribute(self.settings["boreholeId"])) in keys]
+            if len(features) == 0:
+                raise ValueError("None of the ids {} matches a drilling profile".format(", ".join(map(str, ids))))
+        features = sorted(features, key=DIRECTIONS[direction](self.settings))
+
+        ensureApplication()
+        builder = ProfileBuilder("", self.showMessage, self.layerData)
+        pac = builder.getProfilesAndConnectors(features)
+
+        scene = QGraphicsScene()
+        painter = ProfilePainter(scene, self.viewSize[0], self.viewSize[1])
+        painter.setMinBoxHeight(self.settings.get("minBoxHeight", 0))
+        painter.applyScale(xFac, yFac)
+        addDescription = len(pac) == 1 if addDescription is None else addDescription
+        if Path(output).suffix.lower() == ".svg":
+            painter.writeSvg(output, pac, addDescription) # no items needed
+        else:
+            painter.paint(pac, addDescription)
+            SceneExporter(scene).export(output)
+        return len(pac)
+
+    def unmatchedIds(self, ids):
+        """Return the given ids which match no drilling profile"""
+        if ids is None:
+            return []
+        keys = {LayerDataIndex.key(f.attribute(self.settings["boreholeId"])) for f in self.boreholes}
+        return [i for i in ids if LayerDataIndex.key(i) not in keys]
+
+    def _showErrorMessage(self, title, message):
+        """Display an error message"""
+        self.showMessage(title, message, Qgis.Critical)
+
+def loadData(args, settings):
+    """Load the drilling profiles and their layers as given on the command line"""
+    boreholes = readTable(args.boreholes, args.table, args.delimiter)
+    layersFile = args.layers if args.layers is not None else args.boreholes
+    layersTable = "{}_data".format(args.table) if args.table is not None else None
+    layers = readTable(layersFile, layersTable, args.delimiter)
+    return boreholes, groupLayerData(layers, settings["dataId"])
+
+def addDataArguments(parser):
+    """Add the arguments describing the input data"""
+    parser.add_argument("boreholes", help="CSV file or GeoPackage containing the drilling profiles")
+    parser.add_argument("--layers", help="CSV file or GeoPackage containing the layers "
+        "(default: the GeoPackage given as boreholes)")
+    parser.add_argument("--table", help="table of the drilling profiles in a GeoPackage, "
+        "the layers are read from table <table>_data")
+    parser.add_argument("--delimiter", default=";", help="delimiter of CSV files (default: ;)")
+    parser.add_argument("--view-size", type=int, nargs=2, default=[1200, 800], metavar=("WIDTH", "HEIGHT"),
+        help="view size in pixels used for auto-scaling (default: 1200 800)")
+
+def main(argv=None):
+    """Render a section as given on the command line"""
+    parser = argparse.ArgumentParser(prog="python -m geoCore.render",
+        description="Render a section of drilling profiles to a SVG or image file.")
+    addDataArguments(parser)
+    parser.add_argument("-o", "--output", required=True, help="output file (*.svg, *.png, *.jpg, ...)")
+    parser.add_argument("--ids", nargs="+", help="ids of the drilling profiles (default: all)")
+    parser.add_argument("--direction", choices=sorted(DIRECTIONS), default="ns",
+        help="direction of the section (default: ns, i.e. north to south)")
+    parser.add_argument("--xfac", type=float, help="scaling factor of the x-dimension (default: auto)")
+    parser.add_argument("--yfac", type=float, help="scaling factor of the y-dimension (default: auto)")
+    parser.add_argument("--description", dest="description", action="store_true",
+        help="add the description (default: only for single profiles)")
+    parser.add_argument("--no-description", dest="description", action="store_false",
+        help="do not add the description")
+    parser.set_defaults(description=None)
+    args = parser.parse_args(argv)
+
+    settings = Config(printMessage).settings
+    boreholes, layerData = loadData(args, settings)
+    renderer = SectionRenderer(boreholes, layerData, viewSize=args.view_size)
+    unmatched = renderer.unmatchedIds(args.ids)
+    if len(unmatched) > 0:
+        printMessage("Warning", "Drilling profiles not found: {}".format(", ".join(unmatched)), Qgis.Warning)
+    try:
+        renderer.render(args.output, args.ids, args.direction, args.xfac, args.yfac, args.description)
+    except (IOError, ValueError) as e:
+        printMessage("Error", str(e), Qgis.Critical)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+""" This module contains the class SceneExporter
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2019 - 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import math
+from pathlib import Path
+
+from qgis.PyQt.QtGui import QPainter, QImage, QColor
+from qgis.PyQt.QtSvg import QSvgGenerator
+from qgis.PyQt.QtCore import QRectF
+
+from .rasterWriter import PIXEL_SIZE, PngWriter, TiffWriter
+
+# raster formats which are rendered in bands and streamed to the file
+BANDED_WRITERS = {".PNG": PngWriter, ".TIF": TiffWriter, ".TIFF": TiffWriter}
+
+# maximum number of pixels of a band
+MAX_BAND_PIXELS = 4 * 1024 * 1024
+
+class SceneExporter:
+    """This class exports a scene to a SVG or image file"""
+
+    def __init__(self, scene):
+        """Initialize the exporter for the given scene"""
+        self.scene = scene
+
+    def export(self, name):
+        """Export the scene to the given file. The file's suffix determines
+        the format: SVG for '.svg', PNG and TIFF are rendered in horizontal
+        bands, otherwise any image format supported by Qt.
+        Raises IOError if the file cannot be written."""
+        sourceRect, targetRect = self._getSourceAndTargetRect()
+
+        suffix = Path(name).suffix.upper()
+        if suffix in BANDED_WRITERS:
+            self._exportInBands(BANDED_WRITERS[suffix], name, sourceRect)
+            return
+
+        pd = None
+        if suffix == ".SVG":
+            pd = self._svgPaintDevice(name, sourceRect, targetRect)
+        else:
+            pd = self._imgPaintDevice(sourceRect)
+
+        painter = QPainter()
+        painter.begin(pd)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.scene.render(painter, targetRect, sourceRect)
+        painter.end()
+        if hasattr(pd, 'save') and callable(pd.save):
+            if not pd.save(name):
+                raise IOError("Failed to write {}".format(name))
+
+    def _exportInBands(self, writerClass, name, sourceRect):
+        """Render the scene in horizontal bands and stream their rows to the
+        writer. Thus the memory needed is bounded by the band's size."""
+        width = math.ceil(sourceRect.width())
+        height = math.ceil(sourceRect.height())
+        bandHeight = max(1, min(height, MAX_BAND_PIXELS // width))
+        band = QImage(width, bandHeight, QImage.Format_ARGB32_Premultiplied)
+
+        writer = writerClass(name, width, height)
+        try:
+            for top in range(0, height, bandHeight):
+                rows = min(bandHeight, height - top)
+                band.fill(QColor("transparent"))
+                painter = QPainter()
+                painter.begin(band)
+                painter.setRenderHint(QPainter.Antialiasing)
+                self.scene.render(painter, QRectF(0, 0, width, rows),
+                    QRectF(sourceRect.left(), sourceRect.top() + top, width, rows))
+                painter.end()
+                writer.write(self._rgbaRows(band, rows))
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+
+    def _rgbaRows(self, img, rows):
+        """Get the first rows of the image as RGBA bytes without padding"""
+        rgba = img.convertToFormat(QImage.Format_RGBA8888)
+        bits = rgba.constBits()
+        bits.setsize(rgba.bytesPerLine() * rows)
+        data = bits.asstring()
+        rowSize = rgba.width() * PIXEL_SIZE
+        if rgba.bytesPerLine() == rowSize:
+            return data
+        return b"".join([data[i * rgba.bytesPerLine():i * rgba.bytesPerLine() + rowSize] for i in range(rows)])
+
+    def _svgPaintDevice(self, name, sourceRect, targetRect):
+        """Get QSvgGenerator as paint device"""
+        generator = QSvgGenerator()
+        generator.setDescription("This SVG was generated with the geoCore "
+            "plugin of QGIS, written by T-Systems on site services GmbH")
+        generator.setTitle("geoCore")
+        generator.setSize(sourceRect.size().toSize())
+        generator.setViewBox(targetRect)
+        generator.setFileName(name)
+        return generator
+
+    def _imgPaintDevice(self, sourceRect):
+        """Get QImage as paint device"""
+        img = QImage(sourceRect.width(), sourceRect.height(),
+            QImage.Format_ARGB32)
+        img.fill(QColor("transparent"))
+        return img
+
+    def _getSourceAndTargetRect(self):
+        """Returns the source and target rect for export"""
+        self.scene.clearSelection()
+        margin = 5
+        sourceRect = self.scene.itemsBoundingRect()
+        sourceRect.adjust(-margin, -margin, margin, margin)
+        targetRect = QRectF(0, 0, sourceRect.width(), sourceRect.height())
+        return sourceRect, targetRect
@@ -0,0 +1,150 @@
+""" This module contains the class SceneItems
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from itertools import chain
+
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtGui import QPen
+from qgis.PyQt.QtWidgets import QGraphicsItem, QGraphicsRectItem
+
+from .labelItem import LabelItem
+from .levelOfDetail import LevelOfDetail
+from .paintResources import PaintResources
+from .pathBatches import LINE, RECT, PathBatches
+
+class SceneItems:
+    """SceneItems keeps the graphics items an object to be painted has added
+    to the scene. Every item is identified by a key. If the object is painted
+    again (e.g. with different scaling factors) the existing items are moved
+    and resized instead of being created again. Rectangles and lines are
+    merged into path items by PathBatches. The items are drawn according
+    to the level of detail."""
+
+    def __init__(self, scene, batches=None, group=None):
+        """Initialize the items of the given scene. Rectangles and lines are
+        added to the given batches, which are flushed by their owner. Without
+        batches the object uses its own ones and flushes them on commit().
+        The shapes are batched with those of other objects of the same group,
+        by default each object is a group of its own."""
+        self.scene = scene
+        self._ownBatches = batches is None
+        self.batches = PathBatches(scene) if batches is None else batches
+        self.group = self if group is None else group
+        self._items = {}
+        self._texts = {}
+        self._shapes = {} # key -> key of the batch containing the shape
+        self._toolTips = {} # key -> invisible QGraphicsRectItem
+        self._painted = set()
+        self._detail = LevelOfDetail.FULL
+
+    def setDetail(self, detail):
+        """Set the level of detail of all items"""
+        if detail == self._detail:
+            return
+        self._detail = detail
+        for item in self._items.values():
+            self._applyDetail(item)
+        if self._ownBatches:
+            self.batches.setDetail(detail)
+
+    def _applyDetail(self, item):
+        """Show or hide texts according to the level of detail.
+        Visible texts are cached since their layout is expensive to paint."""
+        item.setVisible(self._detail.showText())
+        item.setCacheMode(QGraphicsItem.DeviceCoordinateCache if self._detail.showText()
+            else QGraphicsItem.NoCache)
+
+    def begin(self):
+        """Begin painting the object"""
+        self._painted = set()
+
+    def commit(self):
+        """Finish painting the object. Items which were not painted
+        since begin() are removed from the scene."""
+        for key in [k for k in self._items if k not in self._painted]:
+            self.scene.removeItem(self._items.pop(key))
+            self._texts.pop(key)
+        for key in [k for k in self._shapes if k not in self._painted]:
+            self.batches.discard(self._shapes.pop(key), (self, key))
+        for key in [k for k in self._toolTips if k not in self._painted]:
+            self.scene.removeItem(self._toolTips.pop(key))
+        if self._ownBatches:
+            self.batches.flush()
+
+    def remove(self):
+        """Remove all items from the scene"""
+        for item in chain(self._items.values(), self._toolTips.values()):
+            self.scene.removeItem(item)
+        for key, batchKey in self._shapes.items():
+            self.batches.discard(batchKey, (self, key))
+        self._items = {}
+        self._texts = {}
+        self._shapes = {}
+        self._toolTips = {}
+        if self._ownBatches:
+            self.batches.flush()
+
+    def rect(self, key, x, y, w, h, color, texture=''):
+        """Add or update a rectangle filled with the given colour code and texture"""
+        resources = PaintResources.instance()
+        self._shape(key, resources.pen(), resources.brush(color, texture), (RECT, x, y, w, h))
+
+    def line(self, key, x1, y1, x2, y2):
+        """Add or update a line"""
+        self._shape(key, PaintResources.instance().pen(), None, (LINE, x1, y1, x2, y2))
+
+    def _shape(self, key, pen, brush, shape):
+        """Add or update a shape of the batch of the given pen and brush"""
+        batchKey = self.batches.add(self.group, (self, key), pen, brush, shape)
+        previous = self._shapes.get(key)
+        if (previous is not None) and (previous != batchKey):
+            self.batches.discard(previous, (self, key))
+        self._shapes[key] = batchKey
+        self._painted.add(key)
+
+    def toolTip(self, key, x, y, w, h, text):
+        """Add or update a tool tip shown over the given rectangle. It is an
+        invisible item, thus it is shown at any level of detail."""
+        item = self._toolTips.get(key)
+        if item is None:
+            item = QGraphicsRectItem()
+            item.setPen(QPen(Qt.NoPen))
+            self.scene.addItem(item)
+            self._toolTips[key] = item
+        item.setRect(x, y, w, h)
+        item.setToolTip(text)
+        self._painted.add(key)
+
+    def text(self, key, text, width=None):
+        """Add a text item (see LabelItem) or return the existing one. The
+        item's size is adjusted to the text unless a text width is given.
+        The caller is responsible for positioning the item."""
+        item = self._items.get(key)
+        if (item is None) or (self._texts[key] != text):
+            if item is not None:
+                self.scene.removeItem(item)
+            item = LabelItem(text, width, self.scene.font())
+            self.scene.addItem(item)
+            self._items[key] = item
+            self._texts[key] = text
+            self._applyDetail(item)
+        self._painted.add(key)
+        return item
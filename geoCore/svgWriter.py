@@ -0,0 +1,254 @@
+""" This module contains the classes SvgWriter, SvgItems and SvgText
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import tempfile
+from xml.sax.saxutils import escape, quoteattr
+
+from qgis.PyQt.QtGui import QFontInfo, QFontMetricsF
+
+from .labelItem import MARGIN, LabelItem
+from .paintResources import PaintResources
+
+# margin around the drawing, the same as SceneExporter's
+EXPORT_MARGIN = 5
+
+def _num(value):
+    """Format a coordinate compactly"""
+    text = "{:.2f}".format(value).rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+class SvgText:
+    """A text written by SvgItems. It provides the part of LabelItem's
+    interface used by the objects to be painted."""
+
+    def __init__(self, text, width, font):
+        """Initialize the text, which is wrapped if a width is given"""
+        self.text = text
+        self.width = width
+        self.x = 0.0
+        self.y = 0.0
+        self.toolTip = None
+        self._rect = LabelItem.layoutRect(text, width, font)
+
+    def setX(self, x):
+        """Set the x-position of the text's left side"""
+        self.x = x
+
+    def setY(self, y):
+        """Set the y-position of the text's top"""
+        self.y = y
+
+    def setToolTip(self, toolTip):
+        """Set the tool tip, it is written as the text's title"""
+        self.toolTip = toolTip
+
+    def textWidth(self):
+        """Return the width of the text"""
+        return self._rect.width()
+
+    def boundingRect(self):
+        """Return the text's bounding rect"""
+        return self._rect
+
+class SvgItems:
+    """SvgItems provides the interface of SceneItems used by the objects to be
+    painted. Instead of graphics items the object's shapes and texts are written
+    to the SvgWriter on commit(): the rectangles of each colour and all lines
+    are merged into one path each."""
+
+    def __init__(self, writer):
+        """Initialize the items of the given writer"""
+        self._writer = writer
+        self._fills = {} # colour code -> path data of the rectangles
+        self._lines = []
+        self._toolTips = []
+        self._texts = {}
+
+    def setDetail(self, detail):
+        """Everything is written, the level of detail is ignored"""
+
+    def begin(self):
+        """Begin painting the object"""
+
+    def rect(self, key, x, y, w, h, color, texture=''):
+        """Add a rectangle filled with the given colour code"""
+        self._fills.setdefault(color, []).append("M{} {}h{}v{}h{}z".format(
+            _num(x), _num(y), _num(w), _num(h), _num(-w)))
+        self._writer.extend(x, y, x + w, y + h)
+
+    def line(self, key, x1, y1, x2, y2):
+        """Add a line"""
+        if x1 == x2:
+            self._lines.append("M{} {}V{}".format(_num(x1), _num(y1), _num(y2)))
+        elif y1 == y2:
+            self._lines.append("M{} {}H{}".format(_num(x1), _num(y1), _num(x2)))
+        else:
+            self._lines.append("M{} {}L{} {}".format(_num(x1), _num(y1), _num(x2), _num(y2)))
+        self._writer.extend(x1, y1, x2, y2)
+
+    def toolTip(self, key, x, y, w, h, text):
+        """Add a tool tip shown over the given rectangle"""
+        self._toolTips.append(("M{} {}h{}v{}h{}z".format(_num(x), _num(y), _num(w), _num(h), _num(-w)), text))
+
+    def text(self, key, text, width=None):
+        """Add a text (see SvgText) or return the existing one.
+        The caller is responsible for positioning it."""
+        item = self._texts.get(key)
+        if (item is None) or (item.text != text):
+            item = SvgText(text, width, self._writer.font)
+            self._texts[key] = item
+        return item
+
+    def commit(self):
+        """Write the object's shapes and texts"""
+        self._writer.writeObject(self._fills, self._lines, self._texts.values(), self._toolTips)
+        self._fills = {}
+        self._lines = []
+        self._toolTips = []
+        self._texts = {}
+
+class SvgWriter:
+    """This class streams a drawing to a compact SVG file object by object, no
+    graphics items are needed. The fill colours are shared CSS classes. The
+    body is written to a temporary file next to the target, since the size of
+    the drawing and the colours are only known in the end (see close)."""
+
+    def __init__(self, fileName, font):
+        """Open the file. Texts are laid out with the given font."""
+        self.fileName = fileName
+        self.font = font
+        self._metrics = QFontMetricsF(font)
+        self._classes = {} # colour code -> CSS class
+        self._bounds = None # [left, top, right, bottom]
+        handle, self._bodyName = tempfile.mkstemp(suffix=".svg",
+            dir=os.path.dirname(os.path.abspath(fileName)))
+        self._body = os.fdopen(handle, "w", encoding="utf-8")
+
+    def items(self):
+        """Return new SvgItems for an object to be painted"""
+        return SvgItems(self)
+
+    def extend(self, x1, y1, x2, y2):
+        """Extend the drawing's bounds by the given rectangle"""
+        left, right = min(x1, x2), max(x1, x2)
+        top, bottom = min(y1, y2), max(y1, y2)
+        if self._bounds is None:
+            self._bounds = [left, top, right, bottom]
+        else:
+            b = self._bounds
+            b[0] = min(b[0], left)
+            b[1] = min(b[1], top)
+            b[2] = max(b[2], right)
+            b[3] = max(b[3], bottom)
+
+    def writeObject(self, fills, lines, texts, toolTips=()):
+        """Write the rectangles (path data by colour code), lines (path data),
+        texts (SvgTexts) and tool tips (path data, text) of an object"""
+        parts = []
+        for code, data in fills.items():
+            parts.append('<path class="{}" d="{}"/>'.format(self._class(code), "".join(data)))
+        for data, text in toolTips:
+            parts.append('<path class="t" d="{}"><title>{}</title></path>'.format(data, escape(text)))
+        if len(lines) > 0:
+            parts.append('<path class="l" d="{}"/>'.format("".join(lines)))
+        for t in texts:
+            parts.append(self._text(t))
+        if len(parts) > 0:
+            self._body.write("\n".join(parts) + "\n")
+
+    def _class(self, code):
+        """Get the CSS class of a fill colour"""
+        cssClass = self._classes.get(code)
+        if cssClass is None:
+            cssClass = "c{}".format(len(self._classes))
+            self._classes[code] = cssClass
+        return cssClass
+
+    def _text(self, t):
+        """Get the elements of a text, its lines are wrapped like LabelItem's"""
+        rect = t.boundingRect()
+        self.extend(t.x, t.y, t.x + rect.width(), t.y + rect.height())
+        x = _num(t.x + MARGIN)
+        y = t.y + MARGIN + self._metrics.ascent()
+        elements = []
+        for line in self._wrap(t.text, t.width):
+            if len(line) > 0:
+                elements.append('<text x="{}" y="{}">{}</text>'.format(x, _num(y), escape(line)))
+            y = y + self._metrics.lineSpacing()
+        if t.toolTip is None:
+            return "".join(elements)
+        return "<g><title>{}</title>{}</g>".format(escape(t.toolTip), "".join(elements))
+
+    def _wrap(self, text, width):
+        """Split the text into lines not wider than the given width (if any)"""
+        lines = text.split("\n")
+        if width is None:
+            return lines
+        maxWidth = width - 2 * MARGIN
+        wrapped = []
+        for paragraph in lines:
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = word if len(line) == 0 else line + " " + word
+                if (len(line) > 0) and (self._metrics.horizontalAdvance(candidate) > maxWidth):
+                    wrapped.append(line)
+                    line = word
+                else:
+                    line = candidate
+            wrapped.append(line)
+        return wrapped
+
+    def close(self):
+        """Write the file: the header, the styles and the body"""
+        self._body.close()
+        try:
+            left, top, right, bottom = self._bounds if self._bounds is not None else (0, 0, 0, 0)
+            left, top = left - EXPORT_MARGIN, top - EXPORT_MARGIN
+            width, height = right - left + EXPORT_MARGIN, bottom - top + EXPORT_MARGIN
+            with open(self.fileName, "w", encoding="utf-8") as f:
+                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+                f.write('<svg xmlns="http://www.w3.org/2000/svg" width="{}" height="{}" viewBox="{} {} {} {}">\n'
+                    .format(_num(width), _num(height), _num(left), _num(top), _num(width), _num(height)))
+                f.write("<title>geoCore</title>\n<desc>This SVG was generated with the geoCore plugin of QGIS, "
+                    "written by T-Systems on site services GmbH</desc>\n")
+                f.write("<style>{}</style>\n".format(self._styles()))
+                with open(self._bodyName, encoding="utf-8") as body:
+                    shutil.copyfileobj(body, f)
+                f.write("</svg>\n")
+        finally:
+            os.remove(self._bodyName)
+
+    def abort(self):
+        """Discard the drawing"""
+        self._body.close()
+        os.remove(self._bodyName)
+
+    def _styles(self):
+        """Get the style sheet: the default pen, the font and the fill colours"""
+        resources = PaintResources.instance()
+        styles = ["path{stroke:#000;stroke-width:1}", ".l{fill:none}", ".t{fill:#fff;fill-opacity:0;stroke:none}",
+            "text{{font-family:{};font-size:{}px;white-space:pre}}".format(
+                quoteattr(self.font.family()), QFontInfo(self.font).pixelSize())]
+        for code, cssClass in self._classes.items():
+            styles.append(".{}{{fill:{}}}".format(cssClass, resources.color(code).name()))
+        return "".join(styles)
@@ -0,0 +1,79 @@
+""" This module contains the class Transect
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.core import QgsCoordinateTransform, QgsFeatureRequest, QgsGeometry, QgsProject, QgsUnitTypes
+
+from .boreholeIndex import BoreholeIndex
+
+class Transect:
+    """A section line drawn on the map. The drilling profiles near the line
+    are projected onto it, i.e. the x-position of a profile is its chainage
+    (the distance along the line) instead of the distance to its neighbour."""
+
+    def __init__(self, line, crs, buffer):
+        """Initialize the transect. The line is a QgsGeometry in the given CRS,
+        drilling profiles up to buffer (in metres) away are selected."""
+        self.line = line
+        self.crs = crs
+        self.buffer = buffer
+
+    def select(self, layer):
+        """Select the layer's drilling profiles near the line. Profiles beyond
+        either end of the line are skipped. Return the features ordered by
+        their chainage and their x-positions (in cm), see
+        ProfileBuilder.arrangeProfiles. Raises ValueError if the layer's CRS
+        is geographic, since distances would be in degrees."""
+        crs = layer.crs()
+        if crs.isGeographic():
+            raise ValueError("The CRS of layer {} is geographic, a projected CRS is needed "
+                "to measure along the section line.".format(layer.name()))
+        toMetres = QgsUnitTypes.fromUnitToUnitFactor(crs.mapUnits(), QgsUnitTypes.DistanceMeters)
+
+        line = QgsGeometry(self.line)
+        if crs != self.crs:
+            line.transform(QgsCoordinateTransform(self.crs, crs, QgsProject.instance()))
+
+        chainages = {}
+        for fid, geometry in BoreholeIndex.instance().within(layer, line, self.buffer / toMetres).items():
+            point = geometry.centroid() # centroid of multi-points
+            chainage = line.lineLocatePoint(point)
+            if (chainage >= 0) and not self._beyondEnds(line, point, chainage):
+                chainages[fid] = chainage
+
+        features = sorted(layer.getFeatures(QgsFeatureRequest().setFilterFids(list(chainages))),
+            key=lambda f: chainages[f.id()])
+        return features, [chainages[f.id()] * toMetres * 100 for f in features] # convert to cm
+
+    def _beyondEnds(self, line, point, chainage):
+        """Return True if the point lies beyond either end of the line, i.e. it
+        is located at an end but not perpendicular to the first or last segment"""
+        vertices = line.asPolyline()
+        if len(vertices) < 2:
+            return False
+        tolerance = 1e-9 * max(line.length(), 1.0)
+        p = point.asPoint()
+        if chainage <= tolerance:
+            a, b = vertices[0], vertices[1]
+            return (p.x() - a.x()) * (b.x() - a.x()) + (p.y() - a.y()) * (b.y() - a.y()) < 0
+        if chainage >= line.length() - tolerance:
+            a, b = vertices[-2], vertices[-1]
+            return (p.x() - b.x()) * (b.x() - a.x()) + (p.y() - b.y()) * (b.y() - a.y()) > 0
+        return False
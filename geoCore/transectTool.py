@@ -0,0 +1,86 @@
+""" This module contains the class TransectTool
+
+    geoCore - a QGIS plugin for drawing drilling profiles
+    Copyright (C) 2021  Gerrit Bette, T-Systems on site services GmbH
+
+    This file is part of geoCore.
+
+    geoCore is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    geoCore is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with geoCore.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from qgis.core import QgsGeometry, QgsWkbTypes
+from qgis.gui import QgsMapTool, QgsRubberBand
+from qgis.PyQt.QtCore import Qt, pyqtSignal
+from qgis.PyQt.QtGui import QColor
+
+class TransectTool(QgsMapTool):
+    """Map tool for drawing a section line. Every left click adds a vertex,
+    a right click finishes the line and Escape discards it. The finished line
+    stays visible until the next one is started or the tool is deactivated."""
+
+    # emitted with the finished line (a QgsGeometry in the canvas' CRS)
+    transectDrawn = pyqtSignal(object)
+
+    def __init__(self, canvas):
+        """Initialize the tool of the given map canvas"""
+        super().__init__(canvas)
+        self._points = []
+        self._finished = False
+        self._band = QgsRubberBand(canvas, QgsWkbTypes.LineGeometry)
+        self._band.setColor(QColor(255, 0, 0, 160))
+        self._band.setWidth(2)
+
+    def canvasReleaseEvent(self, e):
+        """Add a vertex or finish the line"""
+        if e.button() == Qt.LeftButton:
+            if self._finished:
+                self._reset()
+            self._points.append(self.toMapCoordinates(e.pos()))
+            self._showLine(self._points)
+        elif e.button() == Qt.RightButton:
+            self._finish()
+
+    def canvasMoveEvent(self, e):
+        """Show the line up to the cursor"""
+        if (len(self._points) > 0) and not self._finished:
+            self._showLine(self._points + [self.toMapCoordinates(e.pos())])
+
+    def keyPressEvent(self, e):
+        """Discard the line on Escape"""
+        if e.key() == Qt.Key_Escape:
+            self._reset()
+
+    def deactivate(self):
+        """Remove the line when another tool is chosen"""
+        self._reset()
+        super().deactivate()
+
+    def _finish(self):
+        """Emit the line if it has at least two vertices"""
+        if self._finished or (len(self._points) < 2):
+            self._reset()
+            return
+        self._finished = True
+        self._showLine(self._points)
+        self.transectDrawn.emit(QgsGeometry.fromPolylineXY(self._points))
+
+    def _showLine(self, points):
+        """Show the line through the given points"""
+        self._band.setToGeometry(QgsGeometry.fromPolylineXY(points), None)
+
+    def _reset(self):
+        """Discard the line"""
+        self._points = []
+        self._finished = False
+        self._band.reset(QgsWkbTypes.LineGeometry)